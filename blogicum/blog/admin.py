@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.utils import timezone
+from django.utils.timesince import timeuntil
 
-from .models import Category, Comment, Location, Post
+from .models import Category, Comment, Location, Post, ScheduledPost
 
 admin.site.register(Category)
 
@@ -19,3 +21,20 @@ class PostAdmin(admin.ModelAdmin):
         'category')
     search_fields = ['text']
     list_filter = ['is_published']
+
+
+@admin.register(ScheduledPost)
+class ScheduledPostAdmin(admin.ModelAdmin):
+    list_display = (
+        'pub_date',
+        'time_left',
+        'title',
+        'author',
+        'category',
+        'is_published')
+    list_filter = ['category']
+    date_hierarchy = 'pub_date'
+
+    @admin.display(description='До публикации')
+    def time_left(self, obj):
+        return timeuntil(obj.pub_date, timezone.now())
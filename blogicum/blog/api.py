@@ -0,0 +1,297 @@
+"""JSON API только для чтения: посты, категории и комментарии.
+
+Видимость та же, что у HTML-лент (visible_posts). Строки берутся через
+values() без создания моделей: выбираются только колонки полей из
+?fields=, категории и местоположения подставляются из blog.lookups.
+Списки листаются курсором ?cursor= (см. blog.cursors), ETag ответа
+собран из версий тегов кеша: тегов запроса (лента, справочники) и тегов
+вернувшихся строк (post:<pk>, author:<id>), которые меняют число
+комментариев и имя автора. Теги строк запоминаются в кеше, поэтому
+повторный запрос без изменений получает 304 без выборки.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db.models import Count
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_safe
+
+from . import cursors, lookups, metrics
+from .cache import tag_versions
+from .constants import API_PAGE_MAX, COMMENT_PATH_STEP, POST_LIST_LEN
+from .models import Comment, User
+from .service import visible_posts
+
+
+class ApiError(Exception):
+    """Ошибка в параметрах запроса, ответ 400."""
+
+
+def _category_slug(category_id, snapshot):
+    category = snapshot.categories.get(category_id)
+    return category.slug if category else None
+
+
+def _location_name(location_id, snapshot):
+    location = snapshot.locations.get(location_id)
+    return location.name if location and location.is_published else None
+
+
+def _image_url(name, snapshot):
+    return default_storage.url(name) if name else None
+
+
+def _depth(path, snapshot):
+    return len(path) // COMMENT_PATH_STEP - 1
+
+
+# Поле API -> (колонка values(), преобразование значения и снимка
+# справочников).
+POST_FIELDS = {
+    'id': ('pk', None),
+    'title': ('title', None),
+    'text': ('text', None),
+    'pub_date': ('pub_date', None),
+    'author': ('author__username', None),
+    'category': ('category_id', _category_slug),
+    'location': ('location_id', _location_name),
+    'image': ('image', _image_url),
+    'comment_count': ('comment_count', None),
+}
+
+COMMENT_FIELDS = {
+    'id': ('pk', None),
+    'post': ('post_id', None),
+    'parent': ('parent_id', None),
+    'depth': ('path', _depth),
+    'author': ('author__username', None),
+    'text': ('text', None),
+    'deleted': ('is_deleted', None),
+    'created_at': ('created_at', None),
+}
+# Поля, которые у удалённого комментария-заглушки отдаются как null.
+DELETED_COMMENT_HIDDEN = ('author', 'text')
+
+CATEGORY_FIELDS = ('slug', 'title', 'description')
+
+
+def parse_fields(request, available):
+    """Поля из ?fields=a,b или все доступные."""
+    value = request.GET.get('fields')
+    if not value:
+        return list(available)
+    fields = [field for field in value.split(',') if field]
+    if not fields:
+        raise ApiError('Не указаны поля.')
+    unknown = set(fields) - set(available)
+    if unknown:
+        raise ApiError('Неизвестные поля: ' + ', '.join(sorted(unknown)))
+    return fields
+
+
+def parse_limit(request):
+    try:
+        limit = int(request.GET.get('limit', POST_LIST_LEN))
+    except ValueError:
+        raise ApiError('limit должен быть числом.')
+    if not 1 <= limit <= API_PAGE_MAX:
+        raise ApiError(f'limit должен быть от 1 до {API_PAGE_MAX}.')
+    return limit
+
+
+def serialize(rows, fields, schema):
+    snapshot = lookups.current()
+    converters = [
+        (field, schema[field][0], schema[field][1]) for field in fields]
+    return [
+        {field: convert(row[column], snapshot) if convert else row[column]
+         for field, column, convert in converters}
+        for row in rows
+    ]
+
+
+ROW_TAGS_PREFIX = 'blogicum:api-tags:'
+
+
+def row_tags(rows, post_key='pk'):
+    """Теги кеша, от которых зависят строки постов или комментариев."""
+    return {tag for row in rows for tag in (
+        f'post:{row[post_key]}', f'author:{row["author_id"]}')}
+
+
+def _rows(queryset, fields, schema, *keys):
+    if 'comment_count' in fields:
+        queryset = queryset.annotate(comment_count=Count('comments'))
+    columns = {schema[field][0] for field in fields} | set(keys)
+    return queryset.values(*columns)
+
+
+def post_rows(queryset, fields):
+    """Строки постов с колонками полей, ключом курсора и автором."""
+    return _rows(queryset, fields, POST_FIELDS, 'pk', 'pub_date', 'author_id')
+
+
+def _page(request, queryset, fields, schema, date_field, descending):
+    limit = parse_limit(request)
+    cursor = request.GET.get('cursor')
+    sign = '-' if descending else ''
+    queryset = queryset.order_by(sign + date_field, sign + 'pk')
+    if cursor:
+        try:
+            queryset = cursors.after(
+                queryset, cursor, date_field, descending)
+        except ValueError:
+            raise ApiError('Некорректный курсор.')
+    rows = list(_rows(queryset, fields, schema, 'pk', date_field,
+                      'author_id')[:limit + 1])
+    next_url = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_url = _next_url(
+            request, cursors.encode(last[date_field], last['pk']))
+    rows = rows[:limit]
+    return {'results': serialize(rows, fields, schema),
+            'next': next_url}, row_tags(rows)
+
+
+def _next_url(request, cursor):
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def post_page(request, queryset):
+    return _page(request, queryset, parse_fields(request, POST_FIELDS),
+                 POST_FIELDS, 'pub_date', descending=True)
+
+
+def _author_id(username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        raise Http404('Автор не найден.')
+    return author_id
+
+
+def _published_category(slug):
+    category = lookups.published_category(slug)
+    if category is None:
+        raise Http404('Категория не найдена.')
+    return category
+
+
+def _etag(key, tags):
+    tags = sorted(tags)
+    return quote_etag(hashlib.md5(
+        f'{key}:{tags}:{tag_versions(*tags)}'.encode()).hexdigest())
+
+
+def api_view(get_tags):
+    """JSON-ответ с ETag из версий тегов.
+
+    get_tags(**kwargs) даёт теги запроса, view возвращает данные и теги
+    вернувшихся строк. Теги строк хранятся под путём и версиями тегов
+    запроса: пока те не сменились, состав строк тот же.
+    """
+    def decorator(view):
+        @require_safe
+        @wraps(view)
+        def wrapper(request, **kwargs):
+            try:
+                versions = tag_versions(*get_tags(**kwargs))
+                key = ROW_TAGS_PREFIX + hashlib.md5(
+                    f'{request.get_full_path()}:{versions}'.encode()
+                ).hexdigest()
+                tags = cache.get(key)
+                response = None
+                if tags is not None:
+                    etag = _etag(key, tags)
+                    response = get_conditional_response(request, etag=etag)
+                metrics.cache_access('api', hit=response is not None)
+                if response is None:
+                    data, tags = view(request, **kwargs)
+                    cache.set(key, tags, settings.PAGE_CACHE_HARD_TTL)
+                    etag = _etag(key, tags)
+                    response = JsonResponse(
+                        data, json_dumps_params={'ensure_ascii': False})
+            except ApiError as error:
+                return JsonResponse({'detail': str(error)}, status=400)
+            except Http404 as error:
+                return JsonResponse(
+                    {'detail': str(error) or 'Не найдено.'}, status=404)
+            response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
+
+
+@api_view(lambda: ('feed:index', lookups.TAG))
+def posts(request):
+    return post_page(request, visible_posts())
+
+
+@api_view(lambda post_id: (f'post:{post_id}', lookups.TAG))
+def post_detail(request, post_id):
+    fields = parse_fields(request, POST_FIELDS)
+    rows = list(post_rows(visible_posts().filter(pk=post_id), fields))
+    if not rows:
+        raise Http404('Пост не найден.')
+    return serialize(rows, fields, POST_FIELDS)[0], row_tags(rows)
+
+
+@api_view(lambda category_slug: (
+    'feed:index', f'category:{category_slug}', lookups.TAG))
+def category_posts(request, category_slug):
+    category = _published_category(category_slug)
+    return post_page(request, visible_posts().filter(category_id=category.pk))
+
+
+# Пост автора поднимает feed:index, остальное — теги строк.
+@api_view(lambda username: ('feed:index', lookups.TAG))
+def author_posts(request, username):
+    return post_page(request, visible_posts().filter(
+        author_id=_author_id(username)))
+
+
+@api_view(lambda post_id: (f'post:{post_id}',))
+def comments(request, post_id):
+    """Ветки комментариев в порядке обхода дерева: limit корневых
+    комментариев со всеми ответами. Курсор — путь последнего корня."""
+    if not visible_posts().filter(pk=post_id).exists():
+        raise Http404('Пост не найден.')
+    fields = parse_fields(request, COMMENT_FIELDS)
+    limit = parse_limit(request)
+    cursor = request.GET.get('cursor')
+    if cursor and not (cursor.isdigit() and len(cursor) == COMMENT_PATH_STEP):
+        raise ApiError('Некорректный курсор.')
+    rows = list(_rows(
+        Comment.objects.threads(post_id, cursor, limit + 1),
+        fields, COMMENT_FIELDS, 'path', 'pk', 'post_id', 'author_id',
+        'is_deleted'))
+    roots = [index for index, row in enumerate(rows)
+             if len(row['path']) == COMMENT_PATH_STEP]
+    next_url = None
+    if len(roots) > limit:
+        rows = rows[:roots[limit]]
+        next_url = _next_url(request, rows[roots[limit - 1]]['path'])
+    results = serialize(rows, fields, COMMENT_FIELDS)
+    for row, result in zip(rows, results):
+        if row['is_deleted']:
+            result.update({field: None for field in DELETED_COMMENT_HIDDEN
+                           if field in result})
+    return {'results': results, 'next': next_url}, row_tags(rows, 'post_id')
+
+
+@api_view(lambda: (lookups.TAG,))
+def categories(request):
+    fields = parse_fields(request, CATEGORY_FIELDS)
+    return {'results': [
+        {field: getattr(category, field) for field in fields}
+        for category in lookups.current().categories.values()
+        if category.is_published
+    ]}, set()
@@ -0,0 +1,71 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .views import CategoryPostsView, IndexView, PostDetailView
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_DB_WORKERS,
+            thread_name_prefix='blogicum-db')
+    return _executor
+
+
+def _call(func, *args):
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def run_in_db_pool(func, *args):
+    """Выполняет синхронный код с доступом к БД в ограниченном пуле.
+
+    Штатный sync_to_async выполняет все синхронные представления в одном
+    потоке; пул из ASYNC_DB_WORKERS потоков позволяет обслуживать запросы
+    параллельно, не заводя поток на каждое соединение. При нулевом размере
+    пула используется sync_to_async — так работают тесты, где база
+    доступна только из основного потока.
+    """
+    if not settings.ASYNC_DB_WORKERS:
+        return await sync_to_async(func)(*args)
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _get_executor(), context.run, _call, func, *args)
+
+
+def _render(sync_view, request, kwargs):
+    response = sync_view(request, **kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+def as_async_view(view_class):
+    """Асинхронная версия представления на базе его класса: запросы к
+    БД и отрисовка шаблона уходят в пул, цикл событий не блокируется.
+    Запрос проходит через dispatch() и get() класса, поэтому работают
+    проверка метода и кеш страниц (PageCacheMixin)."""
+    sync_view = view_class.as_view()
+
+    async def view(request, **kwargs):
+        return await run_in_db_pool(_render, sync_view, request, kwargs)
+
+    view.view_class = view_class
+    return view
+
+
+index = as_async_view(IndexView)
+category_posts = as_async_view(CategoryPostsView)
+post_detail = as_async_view(PostDetailView)
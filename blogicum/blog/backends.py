@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from .cache import is_shared
+
+USER_PREFIX = 'blogicum:user:'
+
+
+def user_cache_key(user_id):
+    return f'{USER_PREFIX}{user_id}'
+
+
+def forget_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кеша.
+
+    Запись удаляется после фиксации любого сохранения или удаления
+    пользователя (см. blog.signals), в том числе смены пароля, поэтому
+    проверка хеша сессии видит актуальные данные. Удаление доходит до
+    других процессов только через общий кеш: с LocMemCache бэкенд
+    читает пользователя из базы, как ModelBackend.
+    """
+
+    def get_user(self, user_id):
+        if not is_shared():
+            return super().get_user(user_id)
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
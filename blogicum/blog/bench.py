@@ -0,0 +1,389 @@
+import json
+import random
+from collections import Counter
+import statistics
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.paginator import Paginator
+from django.db import connection, connections
+from django.test import Client
+from django.template.loader import render_to_string
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+
+from . import api, lookups, timeline
+from .cache import invalidate
+from .constants import POST_LIST_LEN
+from .models import (Category, Comment, Follow, Location, Post,
+                     ProlificAuthor, TimelineEntry, User)
+from .service import get_posts, visible_posts
+from .templatetags.pagination import paginator
+
+BATCH_SIZE = 1000
+BENCH_PASSWORD = 'bench-password'
+# Лимиты, которых бенчмарк не достигает: замеряем представления, а не 429.
+NO_AUTH_LIMIT = (10 ** 9, 1)
+
+
+def unthrottled():
+    """Отключает ограничения частоты записи и входа на время прогона."""
+    return override_settings(
+        WRITE_RATE_LIMITS={},
+        AUTH_RATE_LIMITS={
+            bucket: NO_AUTH_LIMIT for bucket in ('ip', 'username', 'global')})
+
+
+def is_success(status_code):
+    return 200 <= status_code < 400
+
+
+def seed(users=20, posts=500, comments=2000, categories=10, locations=10,
+         random_seed=0):
+    """Заполняет базу воспроизводимым набором данных."""
+    fake = Faker('ru_RU')
+    fake.seed_instance(random_seed)
+    rnd = random.Random(random_seed)
+    now = timezone.now()
+    password = make_password(BENCH_PASSWORD)
+
+    User.objects.bulk_create(
+        (User(username=f'bench_{index}', password=password,
+              first_name=fake.first_name(), last_name=fake.last_name(),
+              email=f'bench_{index}@example.com')
+         for index in range(users)),
+        batch_size=BATCH_SIZE)
+    Category.objects.bulk_create(
+        (Category(title=fake.sentence(nb_words=2)[:256],
+                  description=fake.paragraph(),
+                  slug=f'bench-category-{index}',
+                  is_published=index % 10 != 9)
+         for index in range(categories)),
+        batch_size=BATCH_SIZE)
+    Location.objects.bulk_create(
+        (Location(name=fake.city()) for _ in range(locations)),
+        batch_size=BATCH_SIZE)
+    # bulk_create не шлёт сигналов, снимок справочников обновляем сами.
+    invalidate(lookups.TAG)
+
+    user_ids = list(User.objects.filter(
+        username__startswith='bench_').values_list('id', flat=True))
+    category_ids = list(Category.objects.filter(
+        slug__startswith='bench-category-').values_list('id', flat=True))
+    location_ids = list(Location.objects.values_list('id', flat=True))
+    Post.objects.bulk_create(
+        (Post(title=fake.sentence(nb_words=4)[:256],
+              text=fake.text(max_nb_chars=600),
+              pub_date=now - timedelta(minutes=rnd.randrange(525600)),
+              author_id=rnd.choice(user_ids),
+              category_id=rnd.choice(category_ids),
+              location_id=rnd.choice(location_ids + [None]),
+              is_published=rnd.random() > 0.05)
+         for _ in range(posts)),
+        batch_size=BATCH_SIZE)
+
+    post_ids = list(Post.objects.values_list('id', flat=True))
+    Comment.objects.bulk_create(
+        (Comment(text=fake.sentence(), post_id=rnd.choice(post_ids),
+                 author_id=rnd.choice(user_ids))
+         for _ in range(comments)),
+        batch_size=BATCH_SIZE)
+    Comment.objects.fill_root_paths()
+
+
+def get_routes():
+    """Маршруты blog, pages и auth: (имя, url, метод, нужен ли вход)."""
+    post = Post.objects.filter(
+        is_published=True, category__is_published=True,
+        pub_date__lte=timezone.now()).order_by('-pub_date').first()
+    comment = Comment.objects.filter(
+        author=post.author, post=post).first() or Comment.objects.create(
+            text='bench', post=post, author=post.author)
+    category = post.category
+    username = post.author.username
+    return post.author, [
+        ('blog:index', reverse('blog:index'), 'get', False),
+        ('blog:index?page=last', f"{reverse('blog:index')}?page=last",
+         'get', False),
+        ('blog:category_posts',
+         reverse('blog:category_posts', args=(category.slug,)), 'get',
+         False),
+        ('blog:profile', reverse('blog:profile', args=(username,)), 'get',
+         False),
+        ('blog:profile (owner)', reverse('blog:profile', args=(username,)),
+         'get', True),
+        ('blog:post_detail', reverse('blog:post_detail', args=(post.id,)),
+         'get', False),
+        ('blog:edit_profile', reverse('blog:edit_profile'), 'get', True),
+        ('blog:create_post', reverse('blog:create_post'), 'get', True),
+        ('blog:edit_post', reverse('blog:edit_post', args=(post.id,)),
+         'get', True),
+        ('blog:delete_post', reverse('blog:delete_post', args=(post.id,)),
+         'get', True),
+        ('blog:add_comment', reverse('blog:add_comment', args=(post.id,)),
+         'post', True),
+        ('blog:edit_comment',
+         reverse('blog:edit_comment', args=(post.id, comment.id)), 'get',
+         True),
+        ('blog:delete_comment',
+         reverse('blog:delete_comment', args=(post.id, comment.id)), 'get',
+         True),
+        ('pages:about', reverse('pages:about'), 'get', False),
+        ('pages:rules', reverse('pages:rules'), 'get', False),
+        ('login', reverse('login'), 'get', False),
+        ('registration', reverse('registration'), 'get', False),
+        ('password_reset', reverse('password_reset'), 'get', False),
+        ('password_change', reverse('password_change'), 'get', True),
+    ]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(durations, queries=None, allocated=None):
+    total = sum(durations)
+    result = {
+        'requests': len(durations),
+        'p50_ms': percentile(durations, 0.50) * 1000,
+        'p95_ms': percentile(durations, 0.95) * 1000,
+        'p99_ms': percentile(durations, 0.99) * 1000,
+        'mean_ms': statistics.mean(durations) * 1000,
+        'throughput_rps': len(durations) / total if total else 0.0,
+    }
+    if queries is not None:
+        result['queries'] = queries
+    if allocated is not None:
+        result['allocated_kb'] = allocated / 1024
+    return result
+
+
+def measure(func, requests=50, warmup=5):
+    """Замеряет вызовы func(): задержки, SQL-запросы и выделения памяти."""
+    for _ in range(warmup):
+        func()
+    with CaptureQueriesContext(connection) as captured:
+        func()
+    queries = len(captured.captured_queries)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    func()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(
+        stat.size_diff for stat in after.compare_to(before, 'filename')
+        if stat.size_diff > 0)
+
+    durations = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return summarize(durations, queries, allocated)
+
+
+def run_routes(requests=50, warmup=5):
+    author, routes = get_routes()
+    anonymous = Client()
+    logged_in = Client()
+    logged_in.force_login(author)
+    results = {}
+    with unthrottled():
+        for name, url, method, login_required in routes:
+            client = logged_in if login_required else anonymous
+            rejected = Counter()
+
+            def call(client=client, url=url, method=method,
+                     rejected=rejected):
+                if method == 'post':
+                    response = client.post(url, {'text': 'bench comment'})
+                else:
+                    response = client.get(url)
+                if not is_success(response.status_code):
+                    rejected[response.status_code] += 1
+                return response
+
+            status = call().status_code
+            rejected.clear()
+            results[name] = measure(call, requests, warmup)
+            results[name]['status'] = status
+            # Ответы не 2xx/3xx: {код: число}, считаются отдельно.
+            results[name]['rejected'] = dict(rejected)
+    return results
+
+
+def run_paginator(page_counts=(10, 1000, 10000), requests=50, warmup=5):
+    """Отрисовка пагинатора на средней странице: окно ссылок против
+    ссылки на каждую страницу. Возвращает время и размер HTML."""
+    results = {}
+    for pages in page_counts:
+        page = Paginator(range(pages * POST_LIST_LEN), POST_LIST_LEN).page(
+            pages // 2 or 1)
+        for name, on_each_side in (('elided', None), ('full', pages)):
+            context = (paginator(page) if on_each_side is None
+                       else paginator(page, on_each_side, 0))
+
+            def call(context=context):
+                return render_to_string('includes/paginator.html', context)
+
+            stats = measure(call, requests, warmup)
+            stats['html_bytes'] = len(call().encode())
+            results[f'{name}_{pages}'] = stats
+    return results
+
+
+def run_serialization(count=1000, requests=20, warmup=2):
+    """Выдача count постов: JSON API из values() против HTML-карточек
+    из моделей. Замер включает выборку из базы."""
+    fields = list(api.POST_FIELDS)
+
+    def as_json():
+        rows = api.post_rows(
+            visible_posts().order_by('-pub_date', '-pk')[:count], fields)
+        return json.dumps(
+            api.serialize(rows, fields, api.POST_FIELDS),
+            cls=DjangoJSONEncoder, ensure_ascii=False)
+
+    def as_html():
+        posts = lookups.attach(list(get_posts()[:count]))
+        return render_to_string('includes/feed_batch.html', {'posts': posts})
+
+    results = {}
+    for name, call in (('json', as_json), ('html', as_html)):
+        results[name] = measure(call, requests, warmup)
+        results[name]['bytes'] = len(call().encode())
+    results['posts'] = min(count, visible_posts().count())
+    return results
+
+
+def run_timeline(followers=10000, requests=20, warmup=2):
+    """Лента подписок у автора с followers подписчиками.
+
+    Запись: новый пост с рассылкой по лентам подписчиков против поста
+    автора из ProlificAuthor. Чтение: первая страница ленты читателя,
+    подписанного на всех авторов базы, против запроса author_id IN.
+    """
+    password = make_password(BENCH_PASSWORD)
+    star = User.objects.create(username='bench_star', password=password)
+    User.objects.bulk_create(
+        (User(username=f'bench_follower_{index}', password=password)
+         for index in range(followers)),
+        batch_size=BATCH_SIZE)
+    follower_ids = list(User.objects.filter(
+        username__startswith='bench_follower_').values_list('id', flat=True))
+    Follow.objects.bulk_create(
+        (Follow(user_id=pk, author=star) for pk in follower_ids),
+        batch_size=BATCH_SIZE)
+    reader = User.objects.get(pk=follower_ids[0])
+    for author in User.objects.filter(posts__isnull=False).distinct():
+        timeline.follow(reader, author)
+    category_id = next(iter(lookups.published_category_ids()))
+
+    def write():
+        return Post.objects.create(
+            title='bench', text='bench', author=star,
+            category_id=category_id, pub_date=timezone.now())
+
+    def read_in():
+        return list(get_posts().filter(author_id__in=Follow.objects.filter(
+            user=reader).values('author_id'))[:POST_LIST_LEN + 1])
+
+    results = {'followers': followers}
+    # Каждый вызов добавляет followers строк, поэтому замеров меньше.
+    with override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=followers + 1):
+        results['write_fan_out'] = measure(
+            write, max(1, requests // 10), min(warmup, 1))
+    ProlificAuthor.objects.create(author=star)
+    results['write_prolific'] = measure(write, requests, warmup)
+    results['read_timeline'] = measure(
+        lambda: timeline.page(reader), requests, warmup)
+    results['read_author_in'] = measure(read_in, requests, warmup)
+    results['timeline_entries'] = TimelineEntry.objects.count()
+    return results
+
+
+def compare(current, baseline):
+    """Относительное изменение метрик по сравнению с сохранённым прогоном."""
+    diff = {}
+    for name, stats in current.items():
+        base = baseline.get(name)
+        if not isinstance(stats, dict) or not isinstance(base, dict):
+            continue
+        diff[name] = {
+            key: (value - base[key]) / base[key] * 100 if base[key] else None
+            for key, value in stats.items()
+            if isinstance(value, (int, float)) and key in base
+            and key != 'status'
+        }
+    return diff
+
+
+def _load_worker(url, deadline, user=None, data=None):
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+    durations = []
+    rejected = Counter()
+    errors = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if data is None:
+                response = client.get(url)
+            else:
+                response = client.post(url, data)
+        except Exception:
+            errors += 1
+            continue
+        if is_success(response.status_code):
+            durations.append(time.perf_counter() - start)
+        else:
+            rejected[response.status_code] += 1
+    connections.close_all()
+    return durations, rejected, errors
+
+
+def run_mixed(readers=4, writers=2, duration=5.0):
+    """Параллельная нагрузка из потоков: чтение ленты и запись
+    комментариев. Возвращает пропускную способность по успешным ответам,
+    отказы по кодам ответа и число исключений."""
+    author, _ = get_routes()
+    post = Post.objects.filter(author=author).first()
+    jobs = [('read', reverse('blog:index'), None, None)] * readers + [
+        ('write', reverse('blog:add_comment', args=(post.id,)), author,
+         {'text': 'bench'})] * writers
+    results = {'read': [], 'write': []}
+    rejected = {'read': Counter(), 'write': Counter()}
+    errors = {'read': 0, 'write': 0}
+    lock = threading.Lock()
+
+    def run(kind, url, user, data):
+        durations, refused, failed = _load_worker(url, deadline, user, data)
+        with lock:
+            results[kind].extend(durations)
+            rejected[kind].update(refused)
+            errors[kind] += failed
+
+    with unthrottled():
+        deadline = time.perf_counter() + duration
+        threads = [threading.Thread(target=run, args=job) for job in jobs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    report = {}
+    for kind, durations in results.items():
+        report[kind] = summarize(durations) if durations else {}
+        report[kind]['rejected'] = dict(rejected[kind])
+        report[kind]['errors'] = errors[kind]
+        report[kind]['throughput_rps'] = len(durations) / duration
+    return report
@@ -0,0 +1,137 @@
+"""Кеш с тегами.
+
+Каждая запись кеша помечается тегами объектов, из которых она
+собрана: post:<id>, category:<slug>, author:<id>, location:<id>,
+feed:index. У тега есть версия; запись хранит версии своих тегов на
+момент создания и считается устаревшей, как только любая из них
+изменилась. Инвалидация — это подъём версии тега, без поиска и
+удаления самих записей.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .models import Category
+
+VERSION_PREFIX = 'blogicum:version:'
+
+
+def _version_key(tag):
+    return VERSION_PREFIX + tag
+
+
+def _init_missing(keys, versions):
+    # Отсутствующая версия заводится от текущего времени, а не с единицы,
+    # чтобы после вытеснения ключа не совпасть со старыми записями.
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def tag_versions(*tags):
+    """Текущие версии тегов в порядке аргументов."""
+    keys = [_version_key(tag) for tag in tags]
+    return _init_missing(keys, cache.get_many(keys))
+
+
+def get_tagged(key, default=None):
+    """Значение записи, если версии её тегов не менялись; иначе default.
+    Список тегов хранится в самой записи."""
+    entry = cache.get(key)
+    if entry is None:
+        return default
+    tags, versions, value = entry
+    if tag_versions(*tags) != versions:
+        return default
+    return value
+
+
+def set_tagged(key, value, tags, timeout=None):
+    tags = tuple(sorted(set(tags)))
+    cache.set(key, (tags, tag_versions(*tags), value), timeout)
+
+
+def _bump(tags):
+    for tag in tags:
+        key = _version_key(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+class _Batch(set):
+    """Теги, накопленные за транзакцию, и отложенные сбросы других кешей;
+    вызывается из on_commit."""
+
+    def __init__(self):
+        super().__init__()
+        self.callbacks = []
+
+    def __call__(self):
+        _bump(self)
+        for callback in self.callbacks:
+            callback()
+
+
+def _current_batch(connection):
+    batch = getattr(connection, 'blogicum_invalidation_batch', None)
+    if batch is not None and any(
+            entry[1] is batch for entry in connection.run_on_commit):
+        return batch
+    # Прежний пакет выполнен или отброшен вместе с откатом.
+    batch = connection.blogicum_invalidation_batch = _Batch()
+    transaction.on_commit(batch, using=connection.alias)
+    return batch
+
+
+def invalidate(*tags, using=DEFAULT_DB_ALIAS):
+    """Поднимает версии тегов после фиксации текущей транзакции.
+
+    Все инвалидации одной транзакции сливаются в один пакет: тег,
+    затронутый многими сохранениями, поднимается один раз, а читатели
+    не успевают закешировать данные, которые ещё не зафиксированы.
+    Вне транзакции версии поднимаются сразу.
+    """
+    connection = connections[using]
+    if not (settings.CACHE_INVALIDATE_ON_COMMIT
+            and connection.in_atomic_block):
+        _bump(set(tags))
+        return
+    _current_batch(connection).update(tags)
+
+
+def after_commit(func, using=DEFAULT_DB_ALIAS):
+    """Вызывает func вместе с пакетом invalidate() текущей транзакции,
+    то есть после её фиксации: иначе читатель успеет закешировать старые
+    данные. Вне транзакции вызывает сразу."""
+    connection = connections[using]
+    if not (settings.CACHE_INVALIDATE_ON_COMMIT
+            and connection.in_atomic_block):
+        func()
+        return
+    _current_batch(connection).callbacks.append(func)
+
+
+def is_shared():
+    """Видят ли записи кеша другие процессы. LocMemCache у каждого
+    процесса свой, и удаление в одном не доходит до остальных."""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def post_tags(author_id, category_id, pk=None):
+    """Теги списков, в которые попадает пост, и самого поста."""
+    tags = {'feed:index', f'author:{author_id}'}
+    if pk is not None:
+        tags.add(f'post:{pk}')
+    slug = Category.objects.filter(pk=category_id).values_list(
+        'slug', flat=True).first()
+    if slug:
+        tags.add(f'category:{slug}')
+    return tags
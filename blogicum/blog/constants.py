@@ -8,4 +8,26 @@ PUB_DATE_HELP = ('Если установить дату и время в буд
 
 POST_LIST_LEN = 10
 
+# Ссылок пагинатора по сторонам от текущей страницы и у краёв.
+PAGINATOR_ON_EACH_SIDE = 2
+PAGINATOR_ON_ENDS = 1
+
 SHORT_TEXT_LEN = 20
+
+# Ширина сегмента пути комментария (pk с ведущими нулями) и глубина
+# веток: ответ глубже COMMENT_MAX_DEPTH становится соседом родителя.
+COMMENT_PATH_STEP = 10
+COMMENT_MAX_DEPTH = 20
+
+FEED_LEN = 20
+
+TRENDING_LEN = 20
+
+# Форматы выгрузки и их Content-Type.
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Наибольший размер страницы JSON API (?limit=).
+API_PAGE_MAX = 100
@@ -0,0 +1,69 @@
+import atexit
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, Value, When
+
+from . import metrics, trending
+from .models import Post
+
+
+class ViewCounter:
+    """Просмотры постов, накопленные в памяти процесса.
+
+    Запись в базу — один UPDATE на все посты раз в
+    VIEW_COUNTER_FLUSH_SECONDS, а не UPDATE на каждое чтение, которое
+    иначе брало бы блокировку записи SQLite. Остаток сбрасывается при
+    завершении процесса; просмотры, набранные после последнего сброса
+    упавшего процесса, теряются.
+    """
+
+    def __init__(self):
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def hit(self, pk):
+        with self._lock:
+            self._pending[pk] += 1
+
+    def flush_due(self):
+        return bool(self._pending) and (
+            time.monotonic() - self._flushed_at
+            >= settings.VIEW_COUNTER_FLUSH_SECONDS)
+
+    def flush(self):
+        """Записывает накопленное одним UPDATE; возвращает число
+        обновлённых постов."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return 0
+        try:
+            updated = Post.objects.filter(pk__in=pending).update(
+                views=F('views') + Case(
+                    *(When(pk=pk, then=Value(count))
+                      for pk, count in pending.items()),
+                    default=Value(0), output_field=IntegerField()))
+        except Exception:
+            # Вернём просмотры, чтобы записать их при следующем сбросе.
+            with self._lock:
+                self._pending.update(pending)
+            raise
+        metrics.inc('blogicum_post_views_total', value=sum(pending.values()))
+        weight = settings.TRENDING_WEIGHTS['view']
+        trending.record(
+            {pk: count * weight for pk, count in pending.items()})
+        return updated
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+            self._flushed_at = time.monotonic()
+
+
+views = ViewCounter()
+atexit.register(views.flush)
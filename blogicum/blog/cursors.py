@@ -0,0 +1,40 @@
+"""Курсоры для постраничного обхода по ключу (дата, pk).
+
+В отличие от OFFSET следующая пачка выбирается условием по индексу и не
+съезжает, когда в начало ленты добавляются новые записи.
+"""
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Q
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+# Пределы, в которых курсор переводится в дату и влезает в колонку
+# целых чисел базы.
+MIN_MICROS, MAX_MICROS = (
+    (moment.replace(tzinfo=timezone.utc) - EPOCH) // MICROSECOND
+    for moment in (datetime.min, datetime.max))
+MAX_PK = 2 ** 63 - 1
+
+
+def encode(moment, pk):
+    return f'{(moment - EPOCH) // MICROSECOND}_{pk}'
+
+
+def decode(cursor):
+    """(дата, pk) из курсора; ValueError, если он испорчен."""
+    micros, _, pk = cursor.partition('_')
+    micros, pk = int(micros), int(pk)
+    if not (MIN_MICROS <= micros <= MAX_MICROS and 0 <= pk <= MAX_PK):
+        raise ValueError('Курсор вне допустимых значений.')
+    return EPOCH + micros * MICROSECOND, pk
+
+
+def after(queryset, cursor, field='pub_date', descending=True, key='pk'):
+    """Записи строго после курсора в порядке (field, key)."""
+    moment, pk = decode(cursor)
+    lookup, sign = ('lt', '-') if descending else ('gt', '')
+    return queryset.filter(
+        Q(**{f'{field}__{lookup}': moment})
+        | Q(**{field: moment, f'{key}__{lookup}': pk})
+    ).order_by(sign + field, sign + key)
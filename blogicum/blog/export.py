@@ -0,0 +1,60 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .constants import EXPORT_CONTENT_TYPES
+from .models import Comment, Post
+
+CHUNK_SIZE = 2000
+
+EXPORTS = {
+    'posts': (Post, 'pub_date', 'author__username', 'category__slug', (
+        'id', 'title', 'text', 'pub_date', 'created_at', 'is_published',
+        'author__username', 'category__slug', 'location__name', 'image')),
+    'comments': (Comment, 'created_at', 'author__username',
+                 'post__category__slug', (
+                     'id', 'post_id', 'author__username', 'text',
+                     'created_at')),
+}
+
+
+def get_rows(kind, since=None, until=None, author=None, category=None):
+    """Словари строк выгрузки: values() по чанкам, без создания моделей."""
+    model, date_field, author_field, category_field, fields = EXPORTS[kind]
+    qs = model.objects.all()
+    if since:
+        qs = qs.filter(**{f'{date_field}__gte': since})
+    if until:
+        qs = qs.filter(**{f'{date_field}__lt': until})
+    if author:
+        qs = qs.filter(**{author_field: author})
+    if category:
+        qs = qs.filter(**{category_field: category})
+    return qs.order_by('pk').values(*fields).iterator(chunk_size=CHUNK_SIZE)
+
+
+def iter_ndjson(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row[field] for field in fields])
+
+
+def iter_export(kind, output_format='ndjson', **filters):
+    if output_format not in EXPORT_CONTENT_TYPES:
+        raise ValueError(f'Неизвестный формат выгрузки: {output_format}.')
+    rows = get_rows(kind, **filters)
+    if output_format == 'csv':
+        return iter_csv(rows, EXPORTS[kind][-1])
+    return iter_ndjson(rows)
@@ -0,0 +1,146 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse, reverse_lazy
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date, quote_etag
+
+from . import lookups, metrics
+from .cache import tag_versions
+from .constants import FEED_LEN
+from .models import User
+from .service import get_posts
+
+
+class LatestPostsFeed(Feed):
+    title = 'Блогикум'
+    link = reverse_lazy('blog:index')
+    description = 'Новые публикации Блогикума'
+
+    def items(self):
+        return lookups.attach(list(get_posts()[:FEED_LEN]))
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.text
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.username
+
+    def item_categories(self, item):
+        return (item.category.title,) if item.category else ()
+
+
+class CategoryFeed(LatestPostsFeed):
+    def get_object(self, request, category_slug):
+        category = lookups.published_category(category_slug)
+        if category is None:
+            raise Http404
+        return category
+
+    def title(self, obj):
+        return f'Блогикум: {obj.title}'
+
+    def link(self, obj):
+        return reverse('blog:category_posts', args=(obj.slug,))
+
+    def description(self, obj):
+        return obj.description
+
+    def items(self, obj):
+        return lookups.attach(
+            list(get_posts().filter(category_id=obj.pk)[:FEED_LEN]))
+
+
+class AuthorFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Блогикум: @{obj.username}'
+
+    def link(self, obj):
+        return reverse('blog:profile', args=(obj.username,))
+
+    def description(self, obj):
+        return f'Публикации пользователя {obj.username}'
+
+    def items(self, obj):
+        return lookups.attach(
+            list(get_posts().filter(author=obj)[:FEED_LEN]))
+
+
+class AtomLatestPostsFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class AtomCategoryFeed(CategoryFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return obj.description
+
+
+class AtomAuthorFeed(AuthorFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+def feed_tags(category_slug=None, username=None):
+    if category_slug:
+        return ('feed:index', f'category:{category_slug}')
+    if username:
+        author = get_object_or_404(User, username=username)
+        return ('feed:index', f'author:{author.pk}')
+    return ('feed:index',)
+
+
+def cached_feed(feed):
+    """Отдаёт ленту, отрисованную один раз на версию содержимого.
+
+    ETag вычисляется из версий тегов кеша, поэтому повторный опрос
+    без изменений получает 304 без обращения к телу ленты. Ссылки в
+    ленте абсолютные, поэтому в ключ входят схема и хост запроса.
+    """
+    def view(request, **kwargs):
+        versions = tag_versions(*feed_tags(**kwargs))
+        url = request.build_absolute_uri(request.path)
+        key = 'blogicum:feed:' + hashlib.md5(
+            f'{url}:{versions}'.encode()).hexdigest()
+        etag = quote_etag(key[-32:])
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            metrics.cache_access('feed', hit=True)
+            response['ETag'] = etag
+            return response
+
+        entry = cache.get(key)
+        metrics.cache_access('feed', hit=entry is not None)
+        if entry is None:
+            rendered = feed(request, **kwargs)
+            entry = (rendered.content, rendered['Content-Type'],
+                     int(time.time()))
+            cache.set(key, entry, settings.FEED_CACHE_TIMEOUT)
+        content, content_type, last_modified = entry
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+    return view
@@ -1,5 +1,6 @@
 from django import forms
 
+from .constants import EXPORT_CONTENT_TYPES
 from .models import Comment, Post, User
 
 
@@ -26,3 +27,13 @@ class CommentForm(forms.ModelForm):
         model = Comment
         fields = ('text',)
         widgets = {'text': forms.Textarea(attrs={'rows': 3, 'cols': 5})}
+
+
+class ExportFilterForm(forms.Form):
+    format = forms.ChoiceField(
+        choices=[(name, name) for name in EXPORT_CONTENT_TYPES],
+        required=False)
+    since = forms.DateTimeField(required=False)
+    until = forms.DateTimeField(required=False)
+    author = forms.CharField(required=False)
+    category = forms.SlugField(required=False)
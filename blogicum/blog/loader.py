@@ -0,0 +1,224 @@
+import json
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.core import serializers
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.utils import timezone
+
+CHUNK_SIZE = 1 << 16
+SEPARATORS = ' \t\r\n,'
+
+SQLITE_LOAD_PRAGMAS = {
+    'synchronous': 'OFF',
+    'temp_store': 'MEMORY',
+    'cache_size': '-262144',
+}
+
+
+class _Reader:
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self):
+        chunk = self.stream.read(self.chunk_size)
+        self.eof = not chunk
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+
+    def skip_separators(self):
+        while True:
+            while (self.pos < len(self.buffer)
+                   and self.buffer[self.pos] in SEPARATORS):
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.pos < len(self.buffer)
+            self.read_more()
+
+
+def iter_objects(stream, chunk_size=CHUNK_SIZE):
+    """Разбирает вывод dumpdata (json или jsonl) по одному объекту, не
+    читая файл целиком."""
+    decoder = json.JSONDecoder()
+    reader = _Reader(stream, chunk_size)
+    if not reader.skip_separators():
+        return
+    if reader.buffer[reader.pos] == '[':
+        reader.pos += 1
+    while reader.skip_separators() and reader.buffer[reader.pos] != ']':
+        try:
+            obj, reader.pos = decoder.raw_decode(reader.buffer, reader.pos)
+        except json.JSONDecodeError:
+            if reader.eof:
+                raise
+            reader.read_more()
+            continue
+        yield obj
+        if reader.pos > chunk_size:
+            reader.read_more()
+
+
+class _InsertPlan:
+    """Готовый INSERT для модели и преобразование полей дампа в
+    значения для БД без создания экземпляров модели."""
+
+    def __init__(self, model, connection, ignore_conflicts):
+        if model._meta.parents:
+            raise ImproperlyConfigured(
+                f'Модель {model._meta.label} с multi-table наследованием '
+                'не поддерживается.')
+        self.connection = connection
+        self.fields = model._meta.local_concrete_fields
+        self.m2m_fields = [
+            field for field in model._meta.many_to_many
+            if field.remote_field.through._meta.auto_created
+        ]
+        quote = connection.ops.quote_name
+        self.sql = '{} {} ({}) VALUES ({})'.format(
+            connection.ops.insert_statement(
+                ignore_conflicts=ignore_conflicts),
+            quote(model._meta.db_table),
+            ', '.join(quote(field.column) for field in self.fields),
+            ', '.join(['%s'] * len(self.fields)))
+
+    def row(self, data):
+        fields = data.get('fields', {})
+        values = []
+        for field in self.fields:
+            if field.primary_key:
+                value = data.get('pk')
+            elif field.name in fields:
+                value = fields[field.name]
+            elif getattr(field, 'auto_now_add', False) or getattr(
+                    field, 'auto_now', False):
+                value = timezone.now()
+            else:
+                value = field.get_default()
+            if value is not None:
+                value = field.to_python(value)
+            values.append(field.get_db_prep_save(value, self.connection))
+        return values
+
+
+class BulkLoader:
+    """Загружает строки дампа пачками через executemany, без save(),
+    сигналов и создания экземпляров моделей.
+
+    Буферы сбрасываются в порядке зависимостей: перед пачкой модели
+    записываются накопленные строки всех моделей, от которых она зависит.
+    """
+
+    def __init__(self, using='default', batch_size=5000,
+                 commit_every=100000, ignore_conflicts=False):
+        self.using = using
+        self.connection = connections[using]
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.ignore_conflicts = ignore_conflicts
+        self.order = {
+            model: index for index, model in enumerate(
+                serializers.sort_dependencies(
+                    [(config, None) for config in apps.get_app_configs()],
+                    allow_cycles=True))
+        }
+        self.plans = {}
+        self.buffers = defaultdict(list)
+        self.m2m = defaultdict(list)
+        self.counts = defaultdict(int)
+        self.uncommitted = 0
+
+    def plan(self, model):
+        plan = self.plans.get(model)
+        if plan is None:
+            plan = self.plans[model] = _InsertPlan(
+                model, self.connection, self.ignore_conflicts)
+        return plan
+
+    def rank(self, model):
+        return self.order.get(model, len(self.order))
+
+    def add(self, data):
+        model = apps.get_model(data['model'])
+        plan = self.plan(model)
+        self.buffers[model].append(plan.row(data))
+        fields = data.get('fields', {})
+        for field in plan.m2m_fields:
+            self.m2m[field].extend(
+                (data['pk'], value) for value in fields.get(field.name, ()))
+        if len(self.buffers[model]) >= self.batch_size:
+            self.flush(up_to=self.rank(model))
+
+    def flush(self, up_to=None):
+        with self.connection.cursor() as cursor:
+            for model in sorted(self.buffers, key=self.rank):
+                if up_to is not None and self.rank(model) > up_to:
+                    continue
+                rows = self.buffers.pop(model)
+                cursor.executemany(self.plan(model).sql, rows)
+                self.counts[model._meta.label] += len(rows)
+                self.uncommitted += len(rows)
+        if self.uncommitted >= self.commit_every:
+            self.flush_m2m()
+            transaction.commit(using=self.using)
+            self.uncommitted = 0
+
+    def flush_m2m(self):
+        for field, pairs in self.m2m.items():
+            through = field.remote_field.through
+            through._base_manager.using(self.using).bulk_create(
+                (through(**{
+                    f'{field.m2m_field_name()}_id': obj_pk,
+                    f'{field.m2m_reverse_field_name()}_id': value,
+                }) for obj_pk, value in pairs),
+                batch_size=self.batch_size, ignore_conflicts=True)
+            self.counts[through._meta.label] += len(pairs)
+        self.m2m.clear()
+
+    def load(self, stream):
+        started = time.perf_counter()
+        pragmas = self.set_pragmas(SQLITE_LOAD_PRAGMAS)
+        with self.connection.constraint_checks_disabled():
+            transaction.set_autocommit(False, using=self.using)
+            try:
+                for data in iter_objects(stream):
+                    self.add(data)
+                self.flush()
+                self.flush_m2m()
+                self.connection.check_constraints(table_names=[
+                    apps.get_model(label)._meta.db_table
+                    for label in self.counts])
+                self.reset_sequences()
+                transaction.commit(using=self.using)
+            except Exception:
+                transaction.rollback(using=self.using)
+                raise
+            finally:
+                transaction.set_autocommit(True, using=self.using)
+                self.set_pragmas(pragmas)
+        return self.counts, time.perf_counter() - started
+
+    def set_pragmas(self, pragmas):
+        """Применяет PRAGMA для SQLite и возвращает прежние значения."""
+        if self.connection.vendor != 'sqlite':
+            return {}
+        previous = {}
+        with self.connection.cursor() as cursor:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}')
+                previous[name] = cursor.fetchone()[0]
+                cursor.execute(f'PRAGMA {name} = {value}')
+        return previous
+
+    def reset_sequences(self):
+        sql = self.connection.ops.sequence_reset_sql(no_style(), [
+            apps.get_model(label) for label in self.counts])
+        with self.connection.cursor() as cursor:
+            for line in sql:
+                cursor.execute(line)
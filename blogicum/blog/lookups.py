@@ -0,0 +1,95 @@
+"""Категории и местоположения в памяти процесса.
+
+Таблицы крошечные и меняются редко, поэтому каждый процесс держит их
+целиком и подставляет в посты вместо JOIN. Снимок помечен версией тега
+lookups (см. blog.cache): сигналы сохранения и удаления поднимают её,
+и при следующем обращении процесс перечитывает обе таблицы. Версия
+тега общая для процессов, только если CACHES общий (Redis, Memcached);
+с LocMemCache другие процессы не видят её смены, поэтому снимок ещё и
+живёт не дольше LOOKUPS_MAX_AGE секунд.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from . import metrics
+from .cache import tag_versions
+from .models import Category, Location
+
+TAG = 'lookups'
+
+
+class Lookups:
+    def __init__(self, version, categories, locations):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.categories = {category.pk: category for category in categories}
+        self.locations = {location.pk: location for location in locations}
+        self.slugs = {
+            category.slug: category for category in self.categories.values()}
+        self.published_category_ids = [
+            pk for pk, category in self.categories.items()
+            if category.is_published]
+
+
+class LookupCache:
+    def __init__(self):
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        (version,) = tag_versions(TAG)
+        hit = self._is_fresh(self._snapshot, version)
+        metrics.cache_access('lookups', hit=hit)
+        if hit:
+            return self._snapshot
+        with self._lock:
+            if not self._is_fresh(self._snapshot, version):
+                self._snapshot = Lookups(
+                    version, Category.objects.all(), Location.objects.all())
+            return self._snapshot
+
+    @staticmethod
+    def _is_fresh(snapshot, version):
+        return (snapshot is not None and snapshot.version == version
+                and time.monotonic() - snapshot.loaded_at
+                < settings.LOOKUPS_MAX_AGE)
+
+    def reset(self):
+        self._snapshot = None
+
+
+lookups = LookupCache()
+
+
+def current():
+    """Актуальный снимок справочников."""
+    return lookups.current()
+
+
+def published_category_ids():
+    return current().published_category_ids
+
+
+def published_category(slug):
+    category = current().slugs.get(slug)
+    if category is not None and category.is_published:
+        return category
+    return None
+
+
+def attach(posts):
+    """Подставляет категории и местоположения в уже загруженные посты.
+
+    Ключ, которого нет в снимке, остаётся незаполненным — такой пост
+    загрузит связанный объект обычным запросом.
+    """
+    snapshot = current()
+    for post in posts:
+        for field, objects in (('category', snapshot.categories),
+                               ('location', snapshot.locations)):
+            pk = getattr(post, f'{field}_id')
+            if pk in objects:
+                post._state.fields_cache[field] = objects[pk]
+    return posts
@@ -0,0 +1,146 @@
+import os
+import pickle
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from . import metrics
+
+PENDING = 'pending'
+PROCESSING = 'processing'
+FAILED = 'failed'
+
+
+def _dir(name):
+    path = Path(settings.EMAIL_OUTBOX_PATH) / name
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _file_name(not_before, attempts):
+    # Время в имени позволяет выбирать готовые письма без чтения файлов.
+    return f'{int(not_before * 1000):015d}-{attempts}-{uuid.uuid4().hex}.msg'
+
+
+def _parse_name(name):
+    not_before, attempts, _ = name.split('-', 2)
+    return int(not_before) / 1000, int(attempts)
+
+
+def enqueue(message):
+    """Атомарно кладёт письмо в очередь: запись во временный файл и
+    переименование, так что воркер не увидит недописанный файл."""
+    pending = _dir(PENDING)
+    fd, tmp_path = tempfile.mkstemp(dir=pending, suffix='.tmp')
+    message.connection = None
+    with os.fdopen(fd, 'wb') as file:
+        pickle.dump(message, file)
+    name = _file_name(time.time(), 0)
+    os.replace(tmp_path, pending / name)
+    return name
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Не отправляет письма, а складывает их в очередь на диске.
+
+    Запрос, вызвавший отправку (например, сброс пароля), не ждёт сеть;
+    доставку выполняет команда send_queued_mail через
+    EMAIL_QUEUE_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        count = 0
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            enqueue(message)
+            count += 1
+        metrics.inc('blogicum_emails_total', (('result', 'queued'),), count)
+        return count
+
+
+def claim(batch_size, now=None):
+    """Забирает до batch_size готовых писем в processing.
+
+    os.rename атомарен, поэтому несколько воркеров не получат одно и то
+    же письмо.
+    """
+    now = time.time() if now is None else now
+    pending, processing = _dir(PENDING), _dir(PROCESSING)
+    claimed = []
+    for path in sorted(pending.glob('*.msg')):
+        if len(claimed) >= batch_size or _parse_name(path.name)[0] > now:
+            break
+        try:
+            path.rename(processing / path.name)
+        except FileNotFoundError:
+            continue
+        os.utime(processing / path.name)
+        claimed.append(processing / path.name)
+    return claimed
+
+
+def recover(timeout):
+    """Возвращает в очередь письма, застрявшие в processing дольше
+    timeout секунд, например после падения воркера."""
+    deadline = time.time() - timeout
+    for path in _dir(PROCESSING).glob('*.msg'):
+        if path.stat().st_mtime < deadline:
+            release(path)
+
+
+def release(path, error=None):
+    """Возвращает неотправленное письмо в очередь с экспоненциальной
+    задержкой или, после EMAIL_QUEUE_MAX_ATTEMPTS попыток, в failed."""
+    _, attempts = _parse_name(path.name)
+    if error is None:
+        path.rename(_dir(PENDING) / path.name)
+        return
+    attempts += 1
+    if attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+        path.rename(_dir(FAILED) / path.name)
+        metrics.inc('blogicum_emails_total', (('result', 'failed'),))
+        return
+    delay = settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1)
+    path.rename(_dir(PENDING) / _file_name(time.time() + delay, attempts))
+    metrics.inc('blogicum_emails_total', (('result', 'retried'),))
+
+
+def send_batch(batch_size):
+    """Отправляет пачку писем через одно соединение EMAIL_QUEUE_BACKEND.
+
+    Возвращает число отправленных писем. Если соединение не открылось,
+    письма возвращаются в очередь без увеличения счётчика попыток.
+    """
+    paths = claim(batch_size)
+    if not paths:
+        return 0
+    connection = get_connection(settings.EMAIL_QUEUE_BACKEND)
+    try:
+        connection.open()
+    except Exception:
+        for path in paths:
+            release(path)
+        raise
+    sent = 0
+    try:
+        for path in paths:
+            with open(path, 'rb') as file:
+                message = pickle.load(file)
+            message.connection = connection
+            try:
+                connection.send_messages([message])
+            except Exception as error:
+                release(path, error)
+                continue
+            path.unlink()
+            sent += 1
+    finally:
+        connection.close()
+    metrics.inc('blogicum_emails_total', (('result', 'sent'),), sent)
+    return sent
@@ -0,0 +1,128 @@
+import json
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+
+from blog import bench, counters
+
+
+class Command(BaseCommand):
+    help = ('Заполняет временную базу тестовыми данными, прогоняет все '
+            'маршруты и выводит задержки, пропускную способность, число '
+            'SQL-запросов и выделения памяти в формате JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=500)
+        parser.add_argument('--comments', type=int, default=2000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--locations', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Число замеряемых запросов на маршрут.')
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--output', help='Сохранить результат в файл.')
+        parser.add_argument('--baseline',
+                            help='Сравнить с сохранённым результатом.')
+        parser.add_argument(
+            '--mixed', type=float, metavar='SECONDS',
+            help='Дополнительно прогнать смешанную нагрузку чтения и '
+                 'записи из потоков: со штатными настройками SQLite и с '
+                 'настройками из DATABASES.')
+        parser.add_argument(
+            '--paginator', action='store_true',
+            help='Дополнительно замерить отрисовку пагинатора на 10, 1000 '
+                 'и 10000 страницах.')
+        parser.add_argument(
+            '--api', type=int, metavar='POSTS',
+            help='Дополнительно сравнить выдачу POSTS постов через JSON API '
+                 'и HTML-карточки.')
+        parser.add_argument(
+            '--timeline', type=int, metavar='FOLLOWERS',
+            help='Дополнительно замерить запись и чтение ленты подписок '
+                 'у автора с FOLLOWERS подписчиками.')
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        if options['mixed']:
+            # Потокам нужна общая база в файле, а не в памяти.
+            fd, test_name = tempfile.mkstemp(suffix='.sqlite3')
+            os.close(fd)
+            connection.settings_dict['TEST']['NAME'] = test_name
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True)
+        try:
+            started = time.perf_counter()
+            bench.seed(
+                users=options['users'], posts=options['posts'],
+                comments=options['comments'],
+                categories=options['categories'],
+                locations=options['locations'],
+                random_seed=options['seed'])
+            report = {
+                'dataset': {
+                    key: options[key] for key in (
+                        'users', 'posts', 'comments', 'categories',
+                        'locations', 'seed')
+                },
+                'seed_seconds': time.perf_counter() - started,
+                'routes': bench.run_routes(
+                    options['requests'], options['warmup']),
+            }
+            if options['paginator']:
+                report['paginator'] = bench.run_paginator(
+                    requests=options['requests'], warmup=options['warmup'])
+            if options['api']:
+                report['serialization'] = bench.run_serialization(
+                    options['api'], options['requests'], options['warmup'])
+            if options['timeline']:
+                report['timeline'] = bench.run_timeline(
+                    options['timeline'], options['requests'],
+                    options['warmup'])
+            if options['mixed']:
+                report['mixed'] = self.run_mixed(options)
+        finally:
+            # Просмотры из прогона не сбрасываем в уже удалённую базу.
+            counters.views.reset()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+            report['diff_percent'] = bench.compare(
+                report['routes'], baseline['routes'])
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def run_mixed(self, options):
+        if connection.vendor != 'sqlite':
+            return {'tuned': bench.run_mixed(
+                options['readers'], options['writers'], options['mixed'])}
+        settings_dict = connection.settings_dict
+        tuned = {key: settings_dict.get(key) for key in (
+            'PRAGMAS', 'BUSY_RETRIES', 'IMMEDIATE_TRANSACTIONS')}
+        stock = {
+            'PRAGMAS': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+            'BUSY_RETRIES': 0,
+            'IMMEDIATE_TRANSACTIONS': False,
+        }
+        report = {}
+        for name, config in (('stock', stock), ('tuned', tuned)):
+            connection.close()
+            settings_dict.update(
+                {key: value for key, value in config.items()
+                 if value is not None})
+            report[name] = bench.run_mixed(
+                options['readers'], options['writers'], options['mixed'])
+        return report
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from blog import lookups
+from blog.cache import invalidate
+from blog.loader import BulkLoader
+from blog.models import Comment
+
+
+class Command(BaseCommand):
+    help = ('Потоково загружает дамп dumpdata (json или jsonl) пачками '
+            'bulk_create в порядке зависимостей моделей, без save() и '
+            'сигналов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixture', help='Путь к файлу дампа.')
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--commit-every', type=int, default=100000,
+                            help='Фиксировать транзакцию каждые N строк.')
+        parser.add_argument('--ignore-conflicts', action='store_true',
+                            help='Пропускать строки с существующим pk.')
+
+    def handle(self, *args, **options):
+        loader = BulkLoader(
+            using=options['database'],
+            batch_size=options['batch_size'],
+            commit_every=options['commit_every'],
+            ignore_conflicts=options['ignore_conflicts'])
+        with open(options['fixture'], encoding='utf-8') as stream:
+            counts, seconds = loader.load(stream)
+        # Сигналы не отправлялись: категории и места перечитаются заново.
+        invalidate(lookups.TAG)
+        # Комментарии из дампов без путей становятся корнями веток.
+        Comment.objects.using(options['database']).fill_root_paths()
+        total = sum(counts.values())
+        for label, count in counts.items():
+            self.stdout.write(f'{label}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено строк: {total} за {seconds:.2f} с '
+            f'({total / seconds if seconds else 0:.0f} строк/с)'))
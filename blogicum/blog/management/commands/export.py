@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.constants import EXPORT_CONTENT_TYPES
+from blog.export import EXPORTS, iter_export
+from blog.forms import ExportFilterForm
+
+
+class Command(BaseCommand):
+    help = ('Потоково выгружает публикации или комментарии в NDJSON или '
+            'CSV с постоянным расходом памяти.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(EXPORTS))
+        parser.add_argument('--format', choices=list(EXPORT_CONTENT_TYPES),
+                            default='ndjson')
+        parser.add_argument('--since', help='Дата и время начала периода.')
+        parser.add_argument('--until', help='Дата и время конца периода.')
+        parser.add_argument('--author', help='Имя пользователя автора.')
+        parser.add_argument('--category', help='Слаг категории.')
+        parser.add_argument('--output', help='Файл; по умолчанию stdout.')
+
+    def handle(self, *args, **options):
+        form = ExportFilterForm({
+            key: options[key] for key in (
+                'format', 'since', 'until', 'author', 'category')
+            if options[key]
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+        filters = form.cleaned_data
+        output_format = filters.pop('format')
+        chunks = iter_export(options['kind'], output_format, **filters)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8',
+                      newline='') as file:
+                file.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
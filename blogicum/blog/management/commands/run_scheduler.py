@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.cache import is_shared
+from blog.scheduler import scheduler
+
+
+class Command(BaseCommand):
+    help = ('Просыпается к дате каждой отложенной публикации и поднимает '
+            'версии тегов затронутых лент, категорий и авторов в общем '
+            'кеше. Нужен CACHES, общий с веб-процессами: с LocMemCache '
+            'они не увидят сброса, и команда не запускается.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Обработать наступившие публикации и выйти.')
+
+    def handle(self, *args, **options):
+        if not is_shared():
+            raise CommandError(
+                'Кеш процесса не общий с веб-процессами: настройте в '
+                'CACHES общий бэкенд (Redis, Memcached, база данных).')
+        while True:
+            for pk in scheduler.run_pending():
+                self.stdout.write(f'Опубликован пост {pk}')
+            if options['once']:
+                return
+            wake_at = time.time() + settings.SCHEDULER_RELOAD_SECONDS
+            next_due = scheduler.next_due()
+            if next_due is not None:
+                wake_at = min(wake_at, next_due)
+            time.sleep(max(0, wake_at - time.time()))
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import mail
+
+# Предел задержки перед новой попыткой, когда отправка падает подряд.
+MAX_BACKOFF = 300
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма из очереди пачками через одно соединение '
+            'с повторными попытками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--loop', type=float, metavar='SECONDS',
+            help='Работать постоянно, проверяя очередь с этим интервалом. '
+                 'Ошибка отправки не останавливает воркер: он ждёт '
+                 'вдвое дольше после каждой неудачи подряд.')
+        parser.add_argument(
+            '--recover-after', type=float, default=600,
+            help='Через сколько секунд вернуть в очередь письма, '
+                 'захваченные упавшим воркером.')
+
+    def handle(self, *args, **options):
+        if options['loop'] is None:
+            mail.recover(options['recover_after'])
+            self.send_all(options['batch_size'])
+            return
+        failures = 0
+        while True:
+            try:
+                mail.recover(options['recover_after'])
+                self.send_all(options['batch_size'])
+            except Exception as error:
+                failures += 1
+                delay = min(MAX_BACKOFF, options['loop'] * 2 ** failures)
+                self.stderr.write(
+                    f'Ошибка отправки: {error!r}; повтор через {delay:.0f} с')
+            else:
+                failures = 0
+                delay = options['loop']
+            time.sleep(delay)
+
+    def send_all(self, batch_size):
+        sent = mail.send_batch(batch_size)
+        while sent == batch_size:
+            sent = mail.send_batch(batch_size)
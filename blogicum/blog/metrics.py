@@ -0,0 +1,224 @@
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (512, 2048, 8192, 32768, 131072, 524288, 2097152)
+
+COUNTER = 'counter'
+HISTOGRAM = 'histogram'
+
+METRICS = {
+    'blogicum_http_requests_total': (
+        COUNTER, 'Количество обработанных запросов.', None),
+    'blogicum_http_request_duration_seconds': (
+        HISTOGRAM, 'Время обработки запроса.', LATENCY_BUCKETS),
+    'blogicum_http_response_size_bytes': (
+        HISTOGRAM, 'Размер тела ответа.', SIZE_BUCKETS),
+    'blogicum_db_queries_per_request': (
+        HISTOGRAM, 'Количество SQL-запросов на один запрос.',
+        QUERY_COUNT_BUCKETS),
+    'blogicum_db_query_duration_seconds': (
+        HISTOGRAM, 'Время выполнения SQL-запросов.', LATENCY_BUCKETS),
+    'blogicum_cache_requests_total': (
+        COUNTER, 'Обращения к кешу с результатом hit или miss.', None),
+    'blogicum_page_cache_requests_total': (
+        COUNTER, 'Запросы к кешу страниц: hit, stale, refresh, miss.', None),
+    'blogicum_page_cache_locks_total': (
+        COUNTER, 'Попытки взять блокировку перестройки страницы.', None),
+    'blogicum_ratelimit_total': (
+        COUNTER, 'Проверки ограничения частоты запросов.', None),
+    'blogicum_post_views_total': (
+        COUNTER, 'Просмотры постов, записанные в базу.', None),
+    'blogicum_emails_total': (
+        COUNTER, 'Письма в очереди: поставлены, отправлены, повторены, '
+        'отброшены.', None),
+}
+
+
+class _Shard:
+    """Метрики одного потока: пишет только поток-владелец."""
+
+    def __init__(self):
+        self.counters = defaultdict(float)
+        self.histograms = {}
+
+
+class _Owner:
+    """Хранится в threading.local рядом с шардом и умирает вместе с
+    потоком: тогда шард сливается в общий шард завершённых потоков."""
+
+
+_local = threading.local()
+_retired = _Shard()
+_shards = [_retired]
+# Слияние может начаться из сборщика мусора в потоке, который уже держит
+# блокировку, поэтому она реентерабельная.
+_shards_lock = threading.RLock()
+
+
+def _shard():
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _local.shard = _Shard()
+        _local.owner = _Owner()
+        weakref.finalize(_local.owner, _retire, shard)
+        with _shards_lock:
+            _shards.append(shard)
+    return shard
+
+
+def _retire(shard):
+    # Без этого список шардов растёт с каждым потоком сервера, который
+    # заводит поток на запрос, а с ним и стоимость снятия метрик.
+    with _shards_lock:
+        _merge(_retired.counters, _retired.histograms, shard)
+        _shards.remove(shard)
+
+
+def inc(name, labels=(), value=1):
+    _shard().counters[name, labels] += value
+
+
+def observe(name, value, labels=()):
+    histograms = _shard().histograms
+    key = name, labels
+    data = histograms.get(key)
+    if data is None:
+        buckets = METRICS[name][2]
+        data = histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+    data[0][bisect_left(METRICS[name][2], value)] += 1
+    data[1] += value
+    data[2] += 1
+
+
+def cache_access(cache_name, hit):
+    inc('blogicum_cache_requests_total',
+        (('cache', cache_name), ('result', 'hit' if hit else 'miss')))
+
+
+_query_durations = ContextVar('metrics_query_durations', default=None)
+
+
+def begin_request():
+    return _query_durations.set([])
+
+
+def end_request(token):
+    durations = _query_durations.get()
+    _query_durations.reset(token)
+    return durations
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper для всех соединений: время запросов попадает в
+    текущий HTTP-запрос, в том числе из потоков пула асинхронных
+    представлений, куда копируется контекст."""
+    durations = _query_durations.get()
+    if durations is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        durations.append(time.perf_counter() - start)
+
+
+def _merge(counters, histograms, shard):
+    for key, value in dict(shard.counters).items():
+        counters[key] += value
+    for key, (buckets, total, count) in dict(shard.histograms).items():
+        merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+        for index, bucket in enumerate(list(buckets)):
+            merged[0][index] += bucket
+        merged[1] += total
+        merged[2] += count
+
+
+def collect():
+    """Сливает потоковые шарды в один снимок."""
+    counters = defaultdict(float)
+    histograms = {}
+    # Под блокировкой: иначе шард, слитый во время снятия, попал бы в
+    # снимок дважды и счётчики потом уменьшились бы.
+    with _shards_lock:
+        for shard in _shards:
+            _merge(counters, histograms, shard)
+    return counters, histograms
+
+
+def reset():
+    with _shards_lock:
+        for shard in _shards:
+            shard.counters.clear()
+            shard.histograms.clear()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(
+            key, str(value).replace('\\', r'\\').replace('"', r'\"'))
+        for key, value in labels)
+    return '{' + pairs + '}'
+
+
+def _format_value(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _cache_ratios(counters):
+    totals = defaultdict(lambda: [0, 0])
+    for (name, labels), value in counters.items():
+        if name != 'blogicum_cache_requests_total':
+            continue
+        labels = dict(labels)
+        stats = totals[labels['cache']]
+        stats[0] += value if labels['result'] == 'hit' else 0
+        stats[1] += value
+    return {
+        cache_name: hits / total
+        for cache_name, (hits, total) in totals.items() if total
+    }
+
+
+def render():
+    counters, histograms = collect()
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == COUNTER:
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(
+                        f'{name}{_format_labels(labels)} '
+                        f'{_format_value(value)}')
+            continue
+        for (metric, labels), data in sorted(histograms.items()):
+            if metric != name:
+                continue
+            counts, total, count = data
+            cumulative = 0
+            for bound, bucket in zip(buckets + ('+Inf',), counts):
+                cumulative += bucket
+                le = labels + (('le', bound),)
+                lines.append(
+                    f'{name}_bucket{_format_labels(le)} {cumulative}')
+            lines.append(
+                f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+    lines.append('# HELP blogicum_cache_hit_ratio Доля попаданий в кеш.')
+    lines.append('# TYPE blogicum_cache_hit_ratio gauge')
+    for cache_name, ratio in sorted(_cache_ratios(counters).items()):
+        lines.append(
+            f'blogicum_cache_hit_ratio{{cache="{cache_name}"}} {ratio!r}')
+    return '\n'.join(lines) + '\n'
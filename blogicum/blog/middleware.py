@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from . import counters, metrics, routers
+from .scheduler import scheduler
+
+logger = logging.getLogger(__name__)
+
+
+def _record_request(request, response, duration, query_durations):
+    match = request.resolver_match
+    view = match.view_name if match else 'unmatched'
+    status = str(response.status_code)
+    metrics.inc('blogicum_http_requests_total', (
+        ('view', view), ('method', request.method), ('status', status)))
+    metrics.observe('blogicum_http_request_duration_seconds', duration,
+                    (('view', view), ('status', status)))
+    metrics.observe('blogicum_db_queries_per_request', len(query_durations),
+                    (('view', view),))
+    for query_duration in query_durations:
+        metrics.observe('blogicum_db_query_duration_seconds',
+                        query_duration, (('view', view),))
+    if not response.streaming:
+        metrics.observe('blogicum_http_response_size_bytes',
+                        len(response.content), (('view', view),))
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            start = time.perf_counter()
+            token = metrics.begin_request()
+            try:
+                response = await get_response(request)
+            finally:
+                query_durations = metrics.end_request(token)
+            _record_request(request, response,
+                            time.perf_counter() - start, query_durations)
+            return response
+    else:
+        def middleware(request):
+            start = time.perf_counter()
+            token = metrics.begin_request()
+            try:
+                response = get_response(request)
+            finally:
+                query_durations = metrics.end_request(token)
+            _record_request(request, response,
+                            time.perf_counter() - start, query_durations)
+            return response
+    return middleware
+
+
+def _stick_to_primary(response, state):
+    if state.wrote:
+        response.set_cookie(
+            routers.STICKY_COOKIE,
+            str(int(time.time()) + settings.READ_REPLICA_STICKY_SECONDS),
+            max_age=settings.READ_REPLICA_STICKY_SECONDS,
+            samesite='Lax')
+    return response
+
+
+@sync_and_async_middleware
+def read_replica_middleware(get_response):
+    """Открывает состояние маршрутизации БД на время запроса.
+
+    После записи клиент получает cookie и до её истечения читает из
+    основной базы, чтобы автор сразу видел свой пост или комментарий.
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = routers.begin(request)
+            try:
+                response = await get_response(request)
+            finally:
+                state = routers.end(token)
+            return _stick_to_primary(response, state)
+    else:
+        def middleware(request):
+            token = routers.begin(request)
+            try:
+                response = get_response(request)
+            finally:
+                state = routers.end(token)
+            return _stick_to_primary(response, state)
+    return middleware
+
+
+@sync_and_async_middleware
+def scheduler_middleware(get_response):
+    """Публикует наступившие отложенные посты до обработки запроса,
+    чтобы он не получил из кеша страницу без них."""
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            if scheduler.pending():
+                await sync_to_async(scheduler.run_pending)()
+            return await get_response(request)
+    else:
+        def middleware(request):
+            if scheduler.pending():
+                scheduler.run_pending()
+            return get_response(request)
+    return middleware
+
+
+def _count_view(request, response):
+    match = request.resolver_match
+    if (match and match.view_name == 'blog:post_detail'
+            and request.method == 'GET' and response.status_code == 200):
+        counters.views.hit(match.kwargs['post_id'])
+    return counters.views.flush_due()
+
+
+def _flush_views():
+    # Ответ читателю уже готов: ошибка записи не должна превращать его в
+    # 500. Непрошедшие просмотры flush() вернул в очередь.
+    try:
+        counters.views.flush()
+    except Exception:
+        logger.exception('Не удалось записать просмотры постов.')
+
+
+@sync_and_async_middleware
+def view_counter_middleware(get_response):
+    """Считает просмотры страниц постов, в том числе отданных из кеша,
+    и по истечении интервала сбрасывает их в базу."""
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            response = await get_response(request)
+            if _count_view(request, response):
+                await sync_to_async(_flush_views)()
+            return response
+    else:
+        def middleware(request):
+            response = get_response(request)
+            if _count_view(request, response):
+                _flush_views()
+            return response
+    return middleware
+
+
+@sync_and_async_middleware
+def asgi_urlconf_middleware(get_response):
+    """Под ASGI подключает маршруты с асинхронными представлениями."""
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            request.urlconf = settings.ASGI_URLCONF
+            return await get_response(request)
+        return middleware
+    return get_response
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.16 on 2026-10-19 07:56
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_auto_20240705_1324'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledPost',
+            fields=[
+            ],
+            options={
+                'verbose_name': 'отложенная публикация',
+                'verbose_name_plural': 'Отложенные публикации',
+                'ordering': ('pub_date',),
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('blog.post',),
+        ),
+    ]
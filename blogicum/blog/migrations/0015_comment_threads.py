@@ -0,0 +1,36 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:12
+
+from django.db import migrations, models
+from django.db.models.functions import Cast, LPad
+import django.db.models.deletion
+
+
+def fill_root_paths(apps, schema_editor):
+    # Существующие комментарии становятся корнями своих веток.
+    apps.get_model('blog', 'Comment').objects.update(path=LPad(
+        Cast('pk', models.CharField()), 10, models.Value('0')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_scheduledpost'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='blog.comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=200, verbose_name='Путь в ветке'),
+        ),
+        migrations.RunPython(fill_root_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='blog_commen_post_id_34d25d_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_post_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingWindow',
+            fields=[
+                ('name', models.CharField(max_length=16, primary_key=True, serialize=False, verbose_name='Окно')),
+                ('decayed_at', models.DateTimeField(verbose_name='Последнее затухание')),
+            ],
+            options={
+                'verbose_name': 'окно популярности',
+                'verbose_name_plural': 'Окна популярности',
+            },
+        ),
+        migrations.CreateModel(
+            name='PostScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(max_length=16, verbose_name='Окно')),
+                ('score', models.FloatField(default=0, verbose_name='Счёт')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='blog.post', verbose_name='Публикация')),
+            ],
+            options={
+                'verbose_name': 'счёт популярности',
+                'verbose_name_plural': 'Счета популярности',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postscore',
+            index=models.Index(fields=['window', '-score'], name='blog_postsc_window_eec2db_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='postscore',
+            constraint=models.UniqueConstraint(fields=('post', 'window'), name='unique_post_score'),
+        ),
+    ]
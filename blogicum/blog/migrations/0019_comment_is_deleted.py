@@ -0,0 +1,24 @@
+# Generated by Django 3.2.16 on 2026-10-19 08:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0018_follow_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='is_deleted',
+            field=models.BooleanField(default=False, editable=False, help_text='Удалённый комментарий с ответами остаётся в ветке заглушкой без текста.', verbose_name='Удалён'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='replies', to='blog.comment', verbose_name='Ответ на'),
+        ),
+    ]
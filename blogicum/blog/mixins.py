@@ -1,7 +1,9 @@
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import Http404
 from django.shortcuts import redirect
 from django.urls import reverse
 
+from . import cursors, lookups, ratelimit
 from .constants import POST_LIST_LEN
 from .forms import CommentForm, PostForm
 from .models import Comment, Post
@@ -15,6 +17,47 @@ class PostQuerySetMixin:
 
 class PostListMixin(PostQuerySetMixin):
     paginate_by = POST_LIST_LEN
+    batch_url_name = None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        posts = lookups.attach(list(context['object_list']))
+        page = context['page_obj']
+        if page is not None and page.has_next():
+            context['next_url'] = self.get_next_url(posts[-1])
+        return context
+
+    def get_next_url(self, post):
+        """Адрес следующей пачки ленты после post."""
+        return (reverse(self.batch_url_name, kwargs=self.kwargs)
+                + '?cursor=' + cursors.encode(post.pub_date, post.pk))
+
+
+class FeedBatchMixin:
+    """Пачка карточек ленты после курсора ?cursor= без макета
+    страницы, для бесконечной прокрутки."""
+
+    template_name = 'includes/feed_batch.html'
+    paginate_by = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        cursor = self.request.GET.get('cursor')
+        if not cursor:
+            return queryset
+        try:
+            return cursors.after(queryset, cursor)
+        except ValueError:
+            raise Http404('Некорректный курсор.')
+
+    def get_context_data(self, **kwargs):
+        posts = list(self.object_list[:POST_LIST_LEN + 1])
+        context = super().get_context_data(
+            object_list=posts[:POST_LIST_LEN], **kwargs)
+        context['posts'] = context['object_list']
+        if len(posts) > POST_LIST_LEN:
+            context['next_url'] = self.get_next_url(posts[POST_LIST_LEN - 1])
+        return context
 
 
 class OnlyAuthorMixin(UserPassesTestMixin):
@@ -23,6 +66,18 @@ class OnlyAuthorMixin(UserPassesTestMixin):
         return object.author == self.request.user
 
 
+class RateLimitMixin:
+    """Отклоняет POST с кодом 429, если исчерпаны корзины токенов
+    маршрута из WRITE_RATE_LIMITS."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method == 'POST':
+            retry_after = ratelimit.check_write(request)
+            if retry_after:
+                return ratelimit.too_many_requests(request, retry_after)
+        return super().dispatch(request, *args, **kwargs)
+
+
 class PostMixin(LoginRequiredMixin):
     model = Post
     template_name = 'blog/create.html'
@@ -37,6 +92,7 @@ class PostMixin(LoginRequiredMixin):
 
 class CommentMixin:
     model = Comment
+    queryset = Comment.objects.filter(is_deleted=False)
     form_class = CommentForm
     template_name = 'blog/comment.html'
     pk_url_kwarg = 'comment_id'
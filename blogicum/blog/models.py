@@ -1,8 +1,12 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import CharField, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Length, LPad
 from django.urls import reverse
+from django.utils import timezone
 
-from .constants import (IS_PUBLISHED_HELP, PUB_DATE_HELP, SHORT_TEXT_LEN,
+from .constants import (COMMENT_MAX_DEPTH, COMMENT_PATH_STEP,
+                        IS_PUBLISHED_HELP, PUB_DATE_HELP, SHORT_TEXT_LEN,
                         SLUG_HELP)
 
 User = get_user_model()
@@ -87,6 +91,11 @@ class Post(PubModel):
         upload_to='post_images',
         blank=True
     )
+    views = models.PositiveIntegerField(
+        'Просмотры',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'публикация'
@@ -100,6 +109,74 @@ class Post(PubModel):
     def get_absolute_url(self):
         return reverse('blog:post_detail', args=(self.pk,))
 
+    def save(self, *args, **kwargs):
+        """Существующий пост сохраняется без views: их пишет только
+        счётчик просмотров, а в загруженном объекте они устарели.
+
+        С update_fields Django не вставляет строку заново, поэтому
+        сохранение поста, который успели удалить, поднимает DatabaseError
+        «did not affect any rows», а не воскрешает его.
+        """
+        if (not self._state.adding and self.pk is not None and not args
+                and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'views']
+        super().save(*args, **kwargs)
+
+
+class ScheduledPostManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(pub_date__gt=timezone.now())
+
+
+class ScheduledPost(Post):
+    objects = ScheduledPostManager()
+
+    class Meta:
+        proxy = True
+        verbose_name = 'отложенная публикация'
+        verbose_name_plural = 'Отложенные публикации'
+        ordering = ('pub_date',)
+
+
+def path_segment(pk):
+    return str(pk).zfill(COMMENT_PATH_STEP)
+
+
+# Путь корневого комментария, вычисленный в SQL: для bulk_create и
+# миграций, где save() не вызывается.
+ROOT_PATH = LPad(Cast('pk', CharField()), COMMENT_PATH_STEP, Value('0'))
+
+
+class CommentQuerySet(models.QuerySet):
+    def tree(self, post_id):
+        """Все комментарии поста в порядке обхода дерева."""
+        return self.filter(post_id=post_id).order_by('path')
+
+    def threads(self, post_id, after=None, limit=None):
+        """limit веток после корня с путём after одним запросом.
+
+        Ветка — корневой комментарий со всеми ответами, её пути лежат
+        между путём корня и путём следующего корня.
+        """
+        comments = self.tree(post_id)
+        if after:
+            # '~' больше любой цифры: пропускаем и ответы ветки after.
+            comments = comments.filter(path__gt=after + '~')
+        if limit is None:
+            return comments
+        # Корень узнаётся по длине пути: у ответа удалённого комментария
+        # parent тоже пуст.
+        next_root = comments.annotate(path_length=Length('path')).filter(
+            path_length=COMMENT_PATH_STEP).values('path')[limit:limit + 1]
+        return comments.filter(path__lt=Coalesce(
+            Subquery(next_root), Value('~')))
+
+    def fill_root_paths(self):
+        return self.filter(path='').update(path=ROOT_PATH)
+
 
 class Comment(models.Model):
     text = models.TextField('Текст комментария')
@@ -112,12 +189,174 @@ class Comment(models.Model):
         User,
         on_delete=models.CASCADE
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='replies',
+        verbose_name='Ответ на'
+    )
+    path = models.CharField(
+        'Путь в ветке',
+        max_length=COMMENT_PATH_STEP * COMMENT_MAX_DEPTH,
+        blank=True,
+        editable=False
+    )
+    is_deleted = models.BooleanField(
+        'Удалён',
+        default=False,
+        editable=False,
+        help_text='Удалённый комментарий с ответами остаётся в ветке '
+                  'заглушкой без текста.'
+    )
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('created_at',)
         default_related_name = 'comments'
+        indexes = (models.Index(fields=('post', 'path')),)
 
     def __str__(self):
         return self.text[:SHORT_TEXT_LEN]
+
+    @property
+    def depth(self):
+        return len(self.path) // COMMENT_PATH_STEP - 1
+
+    def save(self, *args, **kwargs):
+        """Новому комментарию путь достраивается после вставки: в нём
+        участвует собственный pk."""
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        prefix = ''
+        if self.parent_id:
+            prefix = type(self).objects.filter(pk=self.parent_id).values_list(
+                'path', flat=True).get()
+            if len(prefix) // COMMENT_PATH_STEP >= COMMENT_MAX_DEPTH:
+                prefix = prefix[:-COMMENT_PATH_STEP]
+                self.parent_id = int(prefix[-COMMENT_PATH_STEP:])
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            self.path = prefix + path_segment(self.pk)
+            type(self).objects.filter(pk=self.pk).update(path=self.path)
+
+
+class TrendingWindow(models.Model):
+    name = models.CharField('Окно', max_length=16, primary_key=True)
+    decayed_at = models.DateTimeField('Последнее затухание')
+
+    class Meta:
+        verbose_name = 'окно популярности'
+        verbose_name_plural = 'Окна популярности'
+
+    def __str__(self):
+        return self.name
+
+
+class PostScore(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='scores',
+        verbose_name='Публикация'
+    )
+    window = models.CharField('Окно', max_length=16)
+    score = models.FloatField('Счёт', default=0)
+
+    class Meta:
+        verbose_name = 'счёт популярности'
+        verbose_name_plural = 'Счета популярности'
+        constraints = (models.UniqueConstraint(
+            fields=('post', 'window'), name='unique_post_score'),)
+        indexes = (models.Index(fields=('window', '-score')),)
+
+    def __str__(self):
+        return f'{self.window}: {self.score:.2f}'
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Подписчик'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='followers',
+        verbose_name='Автор'
+    )
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'подписка'
+        verbose_name_plural = 'Подписки'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'), name='unique_follow'),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='no_self_follow'),
+        )
+
+    def __str__(self):
+        return f'{self.user} → {self.author}'
+
+
+class ProlificAuthor(models.Model):
+    """Автор, чьи посты не рассылаются по лентам подписчиков, а
+    подмешиваются в них при чтении: подписчиков слишком много."""
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='prolific',
+        verbose_name='Автор'
+    )
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'автор с лентой при чтении'
+        verbose_name_plural = 'Авторы с лентой при чтении'
+
+    def __str__(self):
+        return str(self.author)
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Публикация'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'запись ленты подписок'
+        verbose_name_plural = 'Записи лент подписок'
+        constraints = (models.UniqueConstraint(
+            fields=('user', 'post'), name='unique_timeline_entry'),)
+        indexes = (models.Index(fields=('user', '-pub_date', '-post')),
+                   models.Index(fields=('user', 'author')))
+
+    def __str__(self):
+        return f'{self.user}: {self.post_id}'
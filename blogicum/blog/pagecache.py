@@ -0,0 +1,188 @@
+"""Кеш страниц со stale-while-revalidate и «дырами» для фрагментов.
+
+Запись живёт в кеше hard TTL, но свежей считается soft TTL и пока не
+изменилась ни одна версия её тегов (см. blog.cache). Устаревшую запись
+перестраивает ровно один обработчик — тот, кто взял блокировку через
+cache.add с арендой на PAGE_CACHE_LOCK_LEASE секунд; остальные тем
+временем отдают устаревшую копию и не запускают get_posts повторно.
+
+Тело страницы кешируется одно на всех. Зависящие от пользователя
+фрагменты (меню в шапке, кнопки автора, форма комментария с CSRF-токеном)
+выводятся тегом {% punch %} как метки и заполняются при каждом ответе.
+"""
+import base64
+import hashlib
+import json
+import re
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import metrics
+from .cache import tag_versions
+from .forms import CommentForm
+from .models import Follow
+
+PAGE_PREFIX = 'blogicum:page:'
+LOCK_PREFIX = 'blogicum:page-lock:'
+
+
+HOLE = re.compile(rb'<!--punch:([A-Za-z0-9_=-]+)-->')
+
+# Дополнительный контекст фрагментов, который нельзя передать в метке:
+# функция от параметров метки и запроса.
+FRAGMENT_CONTEXT = {
+    'includes/comment_form.html': lambda kwargs, request: {
+        'form': CommentForm()},
+    'includes/follow_button.html': lambda kwargs, request: {
+        'following': request.user.is_authenticated and Follow.objects.filter(
+            user=request.user, author_id=kwargs['author_id']).exists()},
+}
+
+
+def render_fragment(template_name, kwargs, request):
+    context = dict(kwargs)
+    if template_name in FRAGMENT_CONTEXT:
+        context.update(FRAGMENT_CONTEXT[template_name](kwargs, request))
+    return render_to_string(template_name, context, request)
+
+
+def punch_hole(template_name, kwargs):
+    payload = base64.urlsafe_b64encode(
+        json.dumps([template_name, kwargs]).encode()).decode()
+    return mark_safe(f'<!--punch:{payload}-->')
+
+
+def fill_holes(content, request):
+    def fill(match):
+        template_name, kwargs = json.loads(
+            base64.urlsafe_b64decode(match.group(1)))
+        return render_fragment(template_name, kwargs, request).encode()
+    return HOLE.sub(fill, content)
+
+
+def page_key(request):
+    return PAGE_PREFIX + hashlib.md5(
+        request.get_full_path().encode()).hexdigest()
+
+
+def cacheable(request):
+    return settings.PAGE_CACHE_ENABLED and request.method == 'GET'
+
+
+def _count(view_name, result):
+    metrics.inc('blogicum_page_cache_requests_total',
+                (('view', view_name), ('result', result)))
+
+
+def _acquire(key):
+    """Берёт блокировку на перестройку; None, если её держит другой."""
+    token = uuid.uuid4().hex
+    acquired = cache.add(
+        LOCK_PREFIX + key, token, settings.PAGE_CACHE_LOCK_LEASE)
+    metrics.inc('blogicum_page_cache_locks_total', (
+        ('result', 'acquired' if acquired else 'contended'),))
+    return token if acquired else None
+
+
+def _release(key, token):
+    # Аренда могла истечь и блокировку мог взять другой обработчик.
+    if cache.get(LOCK_PREFIX + key) == token:
+        cache.delete(LOCK_PREFIX + key)
+
+
+def _is_fresh(entry):
+    tags, versions, created_at, _ = entry
+    return (time.time() - created_at < settings.PAGE_CACHE_SOFT_TTL
+            and tag_versions(*tags) == versions)
+
+
+def _store(key, content, tags):
+    tags = tuple(sorted(set(tags)))
+    cache.set(key, (tags, tag_versions(*tags), time.time(), content),
+              settings.PAGE_CACHE_HARD_TTL)
+
+
+def serve(request, view_name, render):
+    """Отдаёт страницу из кеша или строит её через render().
+
+    render возвращает (response, tags) с незаполненными метками; в кеш
+    попадают ответы с кодом 200, если tags не None.
+    """
+    key = page_key(request)
+    entry = cache.get(key)
+    if entry is not None and _is_fresh(entry):
+        _count(view_name, 'hit')
+        metrics.cache_access('page', hit=True)
+        return HttpResponse(fill_holes(entry[3], request))
+    metrics.cache_access('page', hit=False)
+    token = _acquire(key)
+    if token is None and entry is not None:
+        _count(view_name, 'stale')
+        return HttpResponse(fill_holes(entry[3], request))
+    _count(view_name, 'miss' if entry is None else 'refresh')
+    try:
+        try:
+            response, tags = render()
+        except Exception:
+            # Страница больше не строится (например, пост скрыли — Http404):
+            # устаревшую копию больше никому не отдаём.
+            cache.delete(key)
+            raise
+        if response.status_code == 200 and tags is not None:
+            _store(key, response.content, tags)
+        elif entry is not None:
+            cache.delete(key)
+        response.content = fill_holes(response.content, request)
+        return response
+    finally:
+        if token is not None:
+            _release(key, token)
+
+
+class PageCacheMixin:
+    """Кеширует GET-ответы, общие для всех читателей.
+
+    Теги записи собираются из контекста: теги самого представления из
+    get_cache_tags() и теги всех показанных постов. Представление может
+    обойти кеш для запроса (bypass_page_cache) или не сохранять в него
+    отрисованную страницу (is_page_shared).
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not cacheable(request) or self.bypass_page_cache():
+            return super().get(request, *args, **kwargs)
+        return serve(request, request.resolver_match.view_name,
+                     lambda: self._render_for_cache(request, *args, **kwargs))
+
+    def bypass_page_cache(self):
+        return False
+
+    def is_page_shared(self, context):
+        return True
+
+    def _render_for_cache(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        response.context_data['punch_holes'] = True
+        response.render()
+        if not self.is_page_shared(response.context_data):
+            return response, None
+        return response, self.get_cache_tags(response.context_data)
+
+    def get_cache_tags(self, context):
+        tags = set()
+        posts = context.get('object_list') or ()
+        if context.get('post') is not None:
+            posts = [context['post']]
+        for post in posts:
+            tags |= {f'post:{post.pk}', f'author:{post.author_id}'}
+            if post.category_id:
+                tags.add(f'category:{post.category.slug}')
+            if post.location_id:
+                tags.add(f'location:{post.location_id}')
+        return tags
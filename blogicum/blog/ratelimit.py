@@ -0,0 +1,228 @@
+import math
+import threading
+import time
+from collections import deque
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+from . import metrics
+
+MAX_MEMORY_KEYS = 10000
+# Очистка устаревших ключей проходит по всем ключам, поэтому при потоке
+# новых ключей (перебор логинов) она запускается не чаще раза за столько
+# секунд, а не на каждой попытке.
+SWEEP_INTERVAL = 10
+
+
+class MemorySlidingWindow:
+    """Точное скользящее окно в памяти процесса."""
+
+    def __init__(self):
+        self._hits = {}
+        self._swept_at = -math.inf
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window, now):
+        """Учитывает попытку; возвращает 0 или число секунд до
+        освобождения окна, если лимит исчерпан."""
+        with self._lock:
+            if (len(self._hits) > MAX_MEMORY_KEYS
+                    and now - self._swept_at >= SWEEP_INTERVAL):
+                self._sweep(now)
+            _, hits = self._hits.setdefault(key, (window, deque()))
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) >= limit:
+                return hits[0] + window - now
+            hits.append(now)
+            return 0
+
+    def _sweep(self, now):
+        # У каждого ключа своё окно: ключ с окном в 300 секунд нельзя
+        # удалять по окну в 60 секунд из текущей попытки.
+        self._swept_at = now
+        for key in [key for key, (window, hits) in self._hits.items()
+                    if not hits or hits[-1] <= now - window]:
+            del self._hits[key]
+
+    def reset(self):
+        with self._lock:
+            self._hits.clear()
+            self._swept_at = -math.inf
+
+
+class CacheSlidingWindow:
+    """Приближённое скользящее окно в общем кеше: счётчики текущего и
+    предыдущего фиксированных окон, предыдущее берётся с весом
+    оставшейся доли. Годится для нескольких процессов."""
+
+    prefix = 'blogicum:ratelimit:window:'
+
+    def hit(self, key, limit, window, now):
+        current = int(now // window)
+        elapsed = now - current * window
+        keys = [f'{self.prefix}{key}:{current - 1}',
+                f'{self.prefix}{key}:{current}']
+        counts = cache.get_many(keys)
+        estimated = (counts.get(keys[0], 0) * (window - elapsed) / window
+                     + counts.get(keys[1], 0))
+        if estimated >= limit:
+            return window - elapsed
+        if not cache.add(keys[1], 1, window * 2):
+            try:
+                cache.incr(keys[1])
+            except ValueError:
+                cache.set(keys[1], 1, window * 2)
+        return 0
+
+    def reset(self):
+        pass
+
+
+class MemoryTokenBucket:
+    """Корзины токенов в памяти процесса: ёмкость burst, пополнение
+    rate токенов в секунду."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._swept_at = -math.inf
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now):
+        """Забирает токен; возвращает 0 или число секунд до появления
+        следующего токена."""
+        with self._lock:
+            if (len(self._buckets) > MAX_MEMORY_KEYS
+                    and now - self._swept_at >= SWEEP_INTERVAL):
+                self._sweep(now)
+            tokens, updated = self._buckets.get(key, (burst, now))[:2]
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens < 1:
+                return (1 - tokens) / rate
+            self._buckets[key] = tokens - 1, now, rate, burst
+            return 0
+
+    def _sweep(self, now):
+        # Полностью пополнившиеся корзины неотличимы от новых.
+        self._swept_at = now
+        for key in [
+            key for key, (tokens, updated, rate, burst)
+            in self._buckets.items()
+            if tokens + (now - updated) * rate >= burst
+        ]:
+            del self._buckets[key]
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self._swept_at = -math.inf
+
+
+class CacheTokenBucket:
+    """Корзины токенов в общем кеше. Чтение и запись не атомарны, так
+    что при гонке запрос изредка проходит сверх лимита."""
+
+    prefix = 'blogicum:ratelimit:bucket:'
+
+    def take(self, key, rate, burst, now):
+        key = self.prefix + key
+        tokens, updated = cache.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens < 1:
+            return (1 - tokens) / rate
+        cache.set(key, (tokens - 1, now), math.ceil(burst / rate) + 1)
+        return 0
+
+    def reset(self):
+        pass
+
+
+WINDOWS = {
+    'memory': MemorySlidingWindow(),
+    'cache': CacheSlidingWindow(),
+}
+
+BUCKETS = {
+    'memory': MemoryTokenBucket(),
+    'cache': CacheTokenBucket(),
+}
+
+
+def reset():
+    for backend in (*WINDOWS.values(), *BUCKETS.values()):
+        backend.reset()
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def too_many_requests(request, retry_after):
+    response = render(request, 'pages/429.html',
+                      status=HTTPStatus.TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _count(scope, bucket, limited):
+    metrics.inc('blogicum_ratelimit_total', (
+        ('scope', scope), ('bucket', bucket),
+        ('result', 'limited' if limited else 'allowed')))
+
+
+def _auth_buckets(request, scope):
+    username = request.POST.get('username', '').strip().lower()
+    yield 'ip', f'{scope}:ip:{client_ip(request)}'
+    if username:
+        yield 'username', f'{scope}:username:{username}'
+    yield 'global', f'{scope}:global'
+
+
+def limit_auth(scope):
+    """Ограничивает POST-попытки входа или регистрации по IP, имени
+    пользователя и суммарно. Проверка идёт до вызова представления,
+    то есть до хеширования пароля и валидаторов."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'POST':
+                return view(request, *args, **kwargs)
+            window = WINDOWS[settings.RATELIMIT_BACKEND]
+            now = time.time()
+            for bucket, key in _auth_buckets(request, scope):
+                limit, seconds = settings.AUTH_RATE_LIMITS[bucket]
+                retry_after = window.hit(key, limit, seconds, now)
+                _count(scope, bucket, retry_after)
+                if retry_after:
+                    return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _write_buckets(request, view_name):
+    yield 'user', f'{view_name}:user:{request.user.pk}'
+    yield 'ip', f'{view_name}:ip:{client_ip(request)}'
+
+
+def check_write(request):
+    """Забирает по токену из корзин пользователя и IP для текущего
+    маршрута; возвращает 0 или время до повтора в секундах."""
+    view_name = request.resolver_match.view_name
+    limits = settings.WRITE_RATE_LIMITS.get(view_name)
+    if not limits:
+        return 0
+    buckets = BUCKETS[settings.RATELIMIT_BACKEND]
+    now = time.time()
+    for bucket, key in _write_buckets(request, view_name):
+        if bucket not in limits:
+            continue
+        retry_after = buckets.take(key, *limits[bucket], now)
+        _count(view_name, bucket, retry_after)
+        if retry_after:
+            return retry_after
+    return 0
@@ -0,0 +1,74 @@
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+STICKY_COOKIE = 'db_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+class RoutingState:
+    def __init__(self, request):
+        self.request = request
+        self.wrote = False
+        self._use_replica = None
+
+    @property
+    def use_replica(self):
+        # Решение принимается при первом чтении, когда маршрут уже
+        # разрешён и известен request.resolver_match.
+        if self._use_replica is None:
+            match = self.request.resolver_match
+            if match is None:
+                return False
+            try:
+                primary_until = int(
+                    self.request.COOKIES.get(STICKY_COOKIE, 0))
+            except ValueError:
+                primary_until = 0
+            self._use_replica = (
+                self.request.method in SAFE_METHODS
+                and match.view_name in settings.REPLICA_VIEWS
+                and primary_until < time.time()
+            )
+        return self._use_replica
+
+
+def begin(request):
+    return _state.set(RoutingState(request))
+
+
+def end(token):
+    state = _state.get()
+    _state.reset(token)
+    return state
+
+
+def read_alias():
+    alias = settings.READ_REPLICA_ALIAS
+    return alias if alias in settings.DATABASES else None
+
+
+class PrimaryReplicaRouter:
+    """Чтения из read-only представлений идут в реплику, запись и всё
+    остальное — в основную базу. Вне запроса реплика не используется."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is not None and not state.wrote and state.use_replica:
+            return read_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != read_alias()
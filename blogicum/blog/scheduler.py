@@ -0,0 +1,104 @@
+import heapq
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+from . import sitemaps
+from .cache import invalidate, post_tags
+from .models import Post
+
+
+class Scheduler:
+    """Куча предстоящих pub_date для точной инвалидации кеша.
+
+    Пост с датой в будущем появляется в лентах сам, потому что выборки
+    сравнивают pub_date с текущим временем, но закешированные страницы
+    об этом не узнают. В момент публикации планировщик инвалидирует
+    ровно те теги (лента, категория, автор, пост) и чанки карты сайта,
+    которые затрагивает пост.
+
+    Куча своя в каждом процессе: новые посты попадают в неё из сигнала
+    post_save, посты из других процессов — при перечитывании раз в
+    SCHEDULER_RELOAD_SECONDS. Повторный подъём версии безвреден.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._horizon = None
+
+    def schedule(self, pk, pub_date):
+        timestamp = pub_date.timestamp()
+        if self._horizon is not None and timestamp > self._horizon:
+            with self._lock:
+                heapq.heappush(self._heap, (timestamp, pk))
+
+    def next_due(self):
+        heap = self._heap
+        return heap[0][0] if heap else None
+
+    def _reload_due(self):
+        return (self._loaded_at is None or time.monotonic() - self._loaded_at
+                > settings.SCHEDULER_RELOAD_SECONDS)
+
+    def pending(self, now=None):
+        """Дешёвая проверка на каждый запрос, без обращения к БД."""
+        if self._reload_due():
+            return True
+        next_due = self.next_due()
+        return next_due is not None and next_due <= (now or time.time())
+
+    def load(self, now):
+        # Берём посты позже уже обработанного горизонта, а не позже
+        # now, чтобы не потерять ставшие видимыми между проверками.
+        since = now if self._horizon is None else self._horizon
+        heap = [
+            (pub_date.timestamp(), pk) for pub_date, pk in
+            Post.objects.filter(
+                pub_date__gt=datetime.fromtimestamp(since, timezone.utc)
+            ).values_list('pub_date', 'pk')
+        ]
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap = heap
+            self._loaded_at = time.monotonic()
+            if self._horizon is None:
+                self._horizon = now
+
+    def run_pending(self, now=None):
+        """Публикует наступившие записи; возвращает их pk."""
+        now = now or time.time()
+        if self._reload_due():
+            self.load(now)
+        due = {}
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                timestamp, pk = heapq.heappop(self._heap)
+                due[pk] = timestamp
+            self._horizon = max(self._horizon, now)
+        return publish(due)
+
+
+def publish(due):
+    """Инвалидирует кеши постов {pk: pub_date timestamp}, если дата
+    публикации с тех пор не менялась."""
+    published = []
+    tags = set()
+    for pk, author_id, category_id, pub_date in Post.objects.filter(
+            pk__in=due).values_list('pk', 'author_id', 'category_id',
+                                    'pub_date'):
+        if abs(pub_date.timestamp() - due[pk]) > 1e-3:
+            continue
+        published.append(pk)
+        tags |= post_tags(author_id, category_id, pk)
+        sitemaps.invalidate('profiles', [author_id])
+    if published:
+        invalidate(*tags)
+        sitemaps.invalidate('posts', published)
+    return published
+
+
+scheduler = Scheduler()
@@ -1,17 +1,25 @@
 from django.db.models import Count
 from django.utils import timezone
 
+from .lookups import published_category_ids
 from .models import Post
 
 
+def visible_posts(qs=None):
+    if qs is None:
+        qs = Post.objects.all()
+    return qs.filter(
+        is_published=True,
+        category_id__in=published_category_ids(),
+        pub_date__lte=timezone.now()
+    )
+
+
 def get_posts(self=None):
-    qs = Post.objects.select_related('category', 'location', 'author')
+    qs = Post.objects.select_related('author')
     if not self or self.request.user != self.profile:
-        qs = qs.filter(
-            is_published=True,
-            category__is_published=True,
-            pub_date__lte=timezone.now()
-        )
+        qs = visible_posts(qs)
     else:
         qs = qs.filter(author=self.profile)
-    return qs.annotate(comment_count=Count('comments')).order_by('-pub_date')
+    return qs.annotate(comment_count=Count('comments')).order_by(
+        '-pub_date', '-pk')
@@ -0,0 +1,113 @@
+from functools import partial
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import lookups, metrics, sitemaps, timeline, trending
+from .backends import forget_user
+from .cache import after_commit, invalidate, post_tags
+from .models import Category, Comment, Location, Post, ScheduledPost, User
+from .scheduler import scheduler
+
+
+@receiver(connection_created)
+def record_query_metrics(sender, connection, **kwargs):
+    if metrics.record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(metrics.record_query)
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=ScheduledPost)
+def remember_post_tags(sender, instance, **kwargs):
+    previous = Post.objects.filter(pk=instance.pk).values(
+        'author_id', 'category_id').first() if instance.pk else None
+    instance._previous_tags = post_tags(**previous) if previous else set()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=ScheduledPost)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ScheduledPost)
+def invalidate_post(sender, instance, **kwargs):
+    invalidate(*getattr(instance, '_previous_tags', set()) | post_tags(
+        instance.author_id, instance.category_id, instance.pk))
+    after_commit(partial(sitemaps.invalidate, 'posts', [instance.pk]))
+    after_commit(partial(
+        sitemaps.invalidate, 'profiles', [instance.author_id]))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=ScheduledPost)
+def schedule_post(sender, instance, **kwargs):
+    scheduler.schedule(instance.pk, instance.pub_date)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=ScheduledPost)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        timeline.fan_out(instance)
+    else:
+        timeline.move(instance)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    invalidate(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Comment)
+def rank_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        trending.record(
+            {instance.post_id: settings.TRENDING_WEIGHTS['comment']})
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_slug(sender, instance, **kwargs):
+    instance._previous_slug = None
+    if instance.pk:
+        instance._previous_slug = Category.objects.filter(
+            pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    slugs = {instance.slug, getattr(instance, '_previous_slug', None)}
+    posts = Post.objects.filter(category_id=instance.pk)
+    author_ids = list(posts.values_list('author_id', flat=True).distinct())
+    # Публикация или скрытие категории меняет состав ленты и профилей.
+    invalidate(lookups.TAG, 'feed:index',
+               *(f'category:{slug}' for slug in slugs if slug),
+               *(f'author:{author_id}' for author_id in author_ids))
+    after_commit(partial(sitemaps.invalidate, 'categories', [instance.pk]))
+    after_commit(partial(
+        sitemaps.invalidate, 'posts', list(posts.values_list(
+            'pk', flat=True))))
+    after_commit(partial(sitemaps.invalidate, 'profiles', author_ids))
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_location(sender, instance, **kwargs):
+    invalidate(lookups.TAG, f'location:{instance.pk}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    after_commit(partial(forget_user, instance.pk))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author(sender, instance, update_fields=None, **kwargs):
+    if update_fields == frozenset({'last_login'}):
+        return
+    invalidate(f'author:{instance.pk}')
+    after_commit(partial(sitemaps.invalidate, 'profiles', [instance.pk]))
@@ -0,0 +1,162 @@
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import ExpressionWrapper, F, IntegerField, Max
+from django.urls import reverse
+
+from .models import Category, User
+from .service import visible_posts
+
+KEYSET_BATCH = 2000
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def _chunk_size():
+    return settings.SITEMAP_CHUNK_SIZE
+
+
+def _posts():
+    return visible_posts(), 'pub_date'
+
+
+def _categories():
+    return Category.objects.filter(is_published=True), None
+
+
+def _profiles():
+    return User.objects.filter(
+        pk__in=visible_posts().values('author_id')), None
+
+
+SECTIONS = {
+    'posts': (_posts, 'blog:post_detail', 'id'),
+    'categories': (_categories, 'blog:category_posts', 'slug'),
+    'profiles': (_profiles, 'blog:profile', 'username'),
+}
+
+
+def chunk_of(pk):
+    """Номер чанка, в который попадает объект: чанки нарезаны по pk,
+    так что изменение объекта затрагивает ровно один файл."""
+    return (pk - 1) // _chunk_size()
+
+
+def iter_entries(section, chunk):
+    """Записи чанка с keyset-итерацией по pk вместо OFFSET."""
+    get_queryset, _, url_key = SECTIONS[section]
+    queryset, lastmod_field = get_queryset()
+    fields = ['pk', url_key] + (
+        [lastmod_field] if lastmod_field else [])
+    size = _chunk_size()
+    last_pk, upper_pk = chunk * size, (chunk + 1) * size
+    while True:
+        batch = list(queryset.filter(
+            pk__gt=last_pk, pk__lte=upper_pk
+        ).order_by('pk').values_list(*fields)[:KEYSET_BATCH])
+        yield from batch
+        if len(batch) < KEYSET_BATCH:
+            return
+        last_pk = batch[-1][0]
+
+
+def chunk_exists(section, chunk):
+    size = _chunk_size()
+    queryset = SECTIONS[section][0]()[0]
+    return queryset.filter(
+        pk__gt=chunk * size, pk__lte=(chunk + 1) * size).exists()
+
+
+def list_chunks(section):
+    queryset, lastmod_field = SECTIONS[section][0]()
+    chunks = queryset.annotate(chunk=ExpressionWrapper(
+        (F('pk') - 1) / _chunk_size(), output_field=IntegerField())
+    ).values('chunk').order_by('chunk')
+    if lastmod_field:
+        return list(chunks.annotate(
+            lastmod=Max(lastmod_field)).values_list('chunk', 'lastmod'))
+    return [(chunk, None) for chunk in chunks.values_list(
+        'chunk', flat=True).distinct()]
+
+
+def _site_root(base_url):
+    # Ссылки в файлах абсолютные, поэтому у каждой схемы и хоста свой
+    # каталог. Хост уже проверен по ALLOWED_HOSTS и не содержит «_».
+    return Path(settings.SITEMAP_ROOT) / re.sub(r'[^\w.-]', '_', base_url)
+
+
+def chunk_name(section, chunk):
+    return f'sitemap-{section}-{chunk}.xml'
+
+
+def _write(path, lines):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as file:
+        file.writelines(lines)
+    os.replace(tmp_path, path)
+
+
+def _render_chunk(section, chunk, base_url):
+    url_name = SECTIONS[section][1]
+    yield XML_HEADER
+    yield f'<urlset xmlns="{XMLNS}">\n'
+    for entry in iter_entries(section, chunk):
+        yield '<url><loc>{}</loc>{}</url>\n'.format(
+            escape(base_url + reverse(url_name, args=(entry[1],))),
+            f'<lastmod>{entry[2]:%Y-%m-%d}</lastmod>'
+            if len(entry) > 2 else '')
+    yield '</urlset>\n'
+
+
+def _render_index(base_url):
+    yield XML_HEADER
+    yield f'<sitemapindex xmlns="{XMLNS}">\n'
+    for section in SECTIONS:
+        for chunk, lastmod in list_chunks(section):
+            location = base_url + reverse(
+                'blog:sitemap_chunk', args=(section, chunk))
+            yield '<sitemap><loc>{}</loc>{}</sitemap>\n'.format(
+                escape(location),
+                f'<lastmod>{lastmod:%Y-%m-%d}</lastmod>' if lastmod else '')
+    yield '</sitemapindex>\n'
+
+
+def _is_fresh(path):
+    try:
+        age = time.time() - path.stat().st_mtime
+    except FileNotFoundError:
+        return False
+    return age < settings.SITEMAP_MAX_AGE
+
+
+def get_index(base_url):
+    path = _site_root(base_url) / 'sitemap.xml'
+    if not _is_fresh(path):
+        _write(path, _render_index(base_url))
+    return path
+
+
+def get_chunk(section, chunk, base_url):
+    path = _site_root(base_url) / chunk_name(section, chunk)
+    if not _is_fresh(path):
+        _write(path, _render_chunk(section, chunk, base_url))
+    return path
+
+
+def invalidate(section, pks):
+    """Удаляет с диска только чанки, содержащие изменённые объекты,
+    в каталогах всех хостов."""
+    names = {chunk_name(section, chunk_of(pk)) for pk in pks if pk}
+    for name in names | {'sitemap.xml'}:
+        for path in Path(settings.SITEMAP_ROOT).glob(f'*/{name}'):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
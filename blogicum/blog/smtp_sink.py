@@ -0,0 +1,86 @@
+"""Локальный SMTP-приёмник для тестов и разработки.
+
+Принимает письма на 127.0.0.1 и складывает их в память, не отправляя
+дальше. Умеет отвечать временной ошибкой, чтобы проверять повторные
+попытки:
+
+    with SMTPSink() as sink:
+        settings.EMAIL_HOST, settings.EMAIL_PORT = sink.host, sink.port
+        ...
+        sink.messages
+"""
+import socketserver
+import threading
+from email import message_from_bytes, policy
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        sink = self.server.sink
+        with sink.lock:
+            sink.connections += 1
+        envelope = {'from': None, 'to': []}
+        self.reply('220 blogicum sink')
+        for raw in self.rfile:
+            command = raw.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 blogicum sink')
+            elif verb == 'MAIL':
+                envelope = {'from': command[10:].strip('<> '), 'to': []}
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                envelope['to'].append(command[8:].strip('<> '))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                self.receive(sink, envelope)
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+    def receive(self, sink, envelope):
+        lines = []
+        for raw in self.rfile:
+            if raw in (b'.\r\n', b'.\n'):
+                break
+            lines.append(raw[1:] if raw.startswith(b'..') else raw)
+        with sink.lock:
+            if sink.fail_next:
+                sink.fail_next -= 1
+                self.reply('451 Temporary failure')
+                return
+            sink.messages.append(dict(
+                envelope, message=message_from_bytes(
+                    b''.join(lines), policy=policy.default)))
+        self.reply('250 Queued')
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    def __init__(self, host='127.0.0.1', port=0):
+        self.messages = []
+        self.connections = 0
+        self.fail_next = 0
+        self.lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.sink = self
+        self.host, self.port = self._server.server_address[:2]
+
+    def __enter__(self):
+        threading.Thread(
+            target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
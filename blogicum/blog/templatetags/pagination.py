@@ -0,0 +1,19 @@
+from django import template
+
+from blog.constants import PAGINATOR_ON_EACH_SIDE, PAGINATOR_ON_ENDS
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/paginator.html')
+def paginator(page_obj, on_each_side=PAGINATOR_ON_EACH_SIDE,
+              on_ends=PAGINATOR_ON_ENDS):
+    """Окно ссылок вокруг текущей страницы: первые и последние страницы,
+    соседние с текущей, а между ними многоточие вместо пропуска."""
+    paginator = page_obj.paginator
+    return {
+        'page_obj': page_obj,
+        'page_range': list(paginator.get_elided_page_range(
+            page_obj.number, on_each_side=on_each_side, on_ends=on_ends)),
+        'ellipsis': paginator.ELLIPSIS,
+    }
@@ -0,0 +1,19 @@
+from django import template
+
+from blog.pagecache import punch_hole, render_fragment
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def punch(context, template_name, **kwargs):
+    """Фрагмент, зависящий от пользователя.
+
+    Когда страница строится для общего кеша (punch_holes в контексте),
+    вместо фрагмента выводится метка, которая заполняется для каждого
+    запроса; иначе фрагмент отрисовывается сразу. Фрагмент видит только
+    переданные аргументы и контекстные процессоры.
+    """
+    if context.get('punch_holes'):
+        return punch_hole(template_name, kwargs)
+    return render_fragment(template_name, kwargs, context.request)
@@ -0,0 +1,103 @@
+"""Лента подписок: посты авторов, на которых подписан пользователь.
+
+Запрос author_id IN (подписки) с сортировкой по дате тормозит тем
+сильнее, чем больше подписок. Поэтому новый пост обычного автора сразу
+раскладывается в TimelineEntry каждого подписчика (fan-out on write), и
+лента читается по индексу (user, -pub_date, -post). Автор, у которого
+подписчиков не меньше TIMELINE_FANOUT_MAX_FOLLOWERS, становится
+ProlificAuthor: его посты не рассылаются, а выбираются при чтении
+отдельным запросом (fan-out on read). Обе выборки листаются одним
+курсором (дата, pk поста) из blog.cursors и сливаются.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from . import cursors
+from .constants import POST_LIST_LEN
+from .lookups import published_category_ids
+from .models import Follow, Post, ProlificAuthor, TimelineEntry
+from .service import get_posts, visible_posts
+
+BATCH_SIZE = 1000
+
+
+def _entries(user_ids, posts):
+    return TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=pk, author_id=author_id,
+                       pub_date=pub_date)
+         for user_id in user_ids
+         for pk, author_id, pub_date in posts),
+        batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def is_prolific(author_id):
+    return ProlificAuthor.objects.filter(pk=author_id).exists()
+
+
+def follow(user, author):
+    """Подписывает user на author; False, если подписка уже была."""
+    _, created = Follow.objects.get_or_create(user=user, author=author)
+    if created and not is_prolific(author.pk):
+        # Прежние посты автора тоже должны быть в ленте.
+        _entries([user.pk], Post.objects.filter(author=author).values_list(
+            'pk', 'author_id', 'pub_date'))
+    return created
+
+
+def unfollow(user, author):
+    """Отписывает user от author; False, если подписки не было."""
+    deleted, _ = Follow.objects.filter(user=user, author=author).delete()
+    TimelineEntry.objects.filter(user=user, author=author).delete()
+    return bool(deleted)
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if is_prolific(post.author_id):
+        return
+    limit = settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    followers = list(Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)[:limit])
+    if len(followers) >= limit:
+        # Однажды попавший сюда автор остаётся в чтении при любом числе
+        # подписчиков: его прежние посты уже не разосланы.
+        ProlificAuthor.objects.get_or_create(author_id=post.author_id)
+        return
+    _entries(followers, [(post.pk, post.author_id, post.pub_date)])
+
+
+def move(post):
+    """Переносит записи поста в лентах на его новую дату."""
+    TimelineEntry.objects.filter(post=post).exclude(
+        pub_date=post.pub_date).update(pub_date=post.pub_date)
+
+
+def page(user, cursor=None, limit=POST_LIST_LEN):
+    """До limit + 1 видимых постов ленты user после курсора, от новых.
+
+    ValueError, если курсор испорчен.
+    """
+    entries = TimelineEntry.objects.filter(
+        user=user, pub_date__lte=timezone.now(), post__is_published=True,
+        post__category_id__in=published_category_ids(),
+    ).order_by('-pub_date', '-post_id')
+    if cursor:
+        entries = cursors.after(entries, cursor, key='post_id')
+    keys = list(entries.values_list('pub_date', 'post_id')[:limit + 1])
+    prolific = list(Follow.objects.filter(
+        user=user, author__prolific__isnull=False).values_list(
+            'author_id', flat=True))
+    if prolific:
+        pulled = visible_posts().filter(author_id__in=prolific).order_by(
+            '-pub_date', '-pk')
+        if cursor:
+            pulled = cursors.after(pulled, cursor)
+        # Пост мог попасть в ленты ещё до того, как автор стал ProlificAuthor.
+        merged = {pk: moment for moment, pk in keys}
+        merged.update((pk, moment) for moment, pk in pulled.values_list(
+            'pub_date', 'pk')[:limit + 1])
+        keys = sorted(
+            ((moment, pk) for pk, moment in merged.items()), reverse=True)
+    ids = [pk for _, pk in keys[:limit + 1]]
+    posts = get_posts().in_bulk(ids)
+    return [posts[pk] for pk in ids if pk in posts]
@@ -0,0 +1,93 @@
+"""Популярные посты: счета по окнам времени.
+
+Счёт поста в окне — сумма весов его событий (просмотры, комментарии),
+каждый из которых затухает как exp(-возраст / окно). Счета хранятся в
+PostScore и обновляются пачками: просмотры — при сбросе счётчика
+просмотров, комментарии — при сохранении. Раз в TRENDING_DECAY_SECONDS
+все счета окна умножаются на множитель за прошедшее время, а выдохшиеся
+строки удаляются, так что лента популярного читает готовый топ по
+индексу (window, -score) без GROUP BY по комментариям.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (Case, Count, F, FloatField, OuterRef, Subquery,
+                              Value, When)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Comment, Post, PostScore, TrendingWindow
+from .service import visible_posts
+
+_checked_at = None
+_lock = threading.Lock()
+
+
+def record(weights):
+    """Прибавляет {pk поста: вес} к счетам во всех окнах."""
+    weights = {pk: weight for pk, weight in weights.items() if weight}
+    if not weights:
+        return
+    with transaction.atomic():
+        # Строки нужны только существующим постам: пост могли удалить.
+        PostScore.objects.bulk_create(
+            [PostScore(post_id=pk, window=window)
+             for pk in Post.objects.filter(pk__in=weights).values_list(
+                 'pk', flat=True)
+             for window in settings.TRENDING_WINDOWS],
+            ignore_conflicts=True)
+        PostScore.objects.filter(post_id__in=weights).update(
+            score=F('score') + Case(
+                *(When(post_id=pk, then=Value(float(weight)))
+                  for pk, weight in weights.items()),
+                default=Value(0.0), output_field=FloatField()))
+    maybe_decay()
+
+
+def decay(now=None):
+    """Применяет затухание к окнам, которые давно не затухали."""
+    now = now or timezone.now()
+    for name, seconds in settings.TRENDING_WINDOWS.items():
+        window, _ = TrendingWindow.objects.get_or_create(
+            name=name, defaults={'decayed_at': now})
+        elapsed = (now - window.decayed_at).total_seconds()
+        if elapsed < settings.TRENDING_DECAY_SECONDS:
+            continue
+        with transaction.atomic():
+            # Затухание применяет тот процесс, кто первым сдвинул отметку.
+            if not TrendingWindow.objects.filter(
+                    name=name, decayed_at=window.decayed_at).update(
+                        decayed_at=now):
+                continue
+            scores = PostScore.objects.filter(window=name)
+            scores.update(score=F('score') * math.exp(-elapsed / seconds))
+            scores.filter(score__lt=settings.TRENDING_MIN_SCORE).delete()
+
+
+def maybe_decay():
+    """decay(), но не чаще раза в TRENDING_DECAY_SECONDS на процесс."""
+    global _checked_at
+    with _lock:
+        if (_checked_at is not None and time.monotonic() - _checked_at
+                < settings.TRENDING_DECAY_SECONDS):
+            return
+        _checked_at = time.monotonic()
+    decay()
+
+
+def top(window, limit):
+    """limit видимых постов с наибольшим счётом в окне.
+
+    Число комментариев считается подзапросом только для выбранных
+    постов, а не GROUP BY по всем постам со счётом.
+    """
+    comment_count = Comment.objects.filter(post=OuterRef('pk')).order_by(
+    ).values('post').annotate(count=Count('pk')).values('count')
+    return visible_posts(Post.objects.select_related('author')).filter(
+        scores__window=window
+    ).annotate(
+        comment_count=Coalesce(Subquery(comment_count), 0)
+    ).order_by('-scores__score', '-pk')[:limit]
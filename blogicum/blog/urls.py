@@ -1,12 +1,16 @@
 from django.urls import include, path
 
-from . import views
+from . import api, feeds, views
 
 app_name = 'blog'
 
 profile_urls = [
     path('edit_profile/',
          views.EditProfileView.as_view(), name='edit_profile'),
+    path('<str:username>/follow/',
+         views.FollowView.as_view(), name='follow'),
+    path('<str:username>/unfollow/',
+         views.UnfollowView.as_view(), name='unfollow'),
     path('<str:username>/', views.ProfileView.as_view(), name='profile'),
 ]
 
@@ -27,10 +31,61 @@ posts_urls = [
          views.PostDetailView.as_view(), name='post_detail'),
 ]
 
+feeds_urls = [
+    path('rss/', feeds.cached_feed(feeds.LatestPostsFeed()),
+         name='feed_rss'),
+    path('atom/', feeds.cached_feed(feeds.AtomLatestPostsFeed()),
+         name='feed_atom'),
+    path('category/<slug:category_slug>/rss/',
+         feeds.cached_feed(feeds.CategoryFeed()), name='category_feed_rss'),
+    path('category/<slug:category_slug>/atom/',
+         feeds.cached_feed(feeds.AtomCategoryFeed()),
+         name='category_feed_atom'),
+    path('author/<str:username>/rss/',
+         feeds.cached_feed(feeds.AuthorFeed()), name='author_feed_rss'),
+    path('author/<str:username>/atom/',
+         feeds.cached_feed(feeds.AtomAuthorFeed()),
+         name='author_feed_atom'),
+]
+
+batch_urls = [
+    path('', views.IndexBatchView.as_view(), name='index_batch'),
+    path('category/<slug:category_slug>/',
+         views.CategoryPostsBatchView.as_view(),
+         name='category_posts_batch'),
+    path('profile/<str:username>/',
+         views.ProfileBatchView.as_view(), name='profile_batch'),
+    path('following/',
+         views.FollowingBatchView.as_view(), name='following_batch'),
+]
+
+api_urls = [
+    path('posts/', api.posts, name='api_posts'),
+    path('posts/<int:post_id>/', api.post_detail, name='api_post_detail'),
+    path('posts/<int:post_id>/comments/', api.comments,
+         name='api_comments'),
+    path('categories/', api.categories, name='api_categories'),
+    path('categories/<slug:category_slug>/posts/', api.category_posts,
+         name='api_category_posts'),
+    path('authors/<str:username>/posts/', api.author_posts,
+         name='api_author_posts'),
+]
+
 urlpatterns = [
+    path('sitemap.xml', views.SitemapIndexView.as_view(), name='sitemap'),
+    path('sitemap-<str:section>-<int:chunk>.xml',
+         views.SitemapChunkView.as_view(), name='sitemap_chunk'),
+    path('feeds/', include(feeds_urls)),
+    path('batch/', include(batch_urls)),
+    path('api/', include(api_urls)),
     path('profile/', include(profile_urls)),
     path('posts/', include(posts_urls)),
+    path('export/<str:kind>/', views.ExportView.as_view(), name='export'),
     path('category/<slug:category_slug>/',
          views.CategoryPostsView.as_view(), name='category_posts'),
+    path('following/', views.FollowingView.as_view(), name='following'),
+    path('popular/', views.PopularView.as_view(), name='popular'),
+    path('popular/<str:window>/', views.PopularView.as_view(),
+         name='popular'),
     path('', views.IndexView.as_view(), name='index'),
 ]
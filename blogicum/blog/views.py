@@ -1,35 +1,56 @@
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.exceptions import PermissionDenied
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseBadRequest, StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
 from django.views.generic import (CreateView, DeleteView, DetailView, ListView,
-                                  UpdateView)
+                                  UpdateView, View)
 
-from .forms import CommentForm, PostForm, UserProfileForm
-from .mixins import CommentMixin, OnlyAuthorMixin, PostListMixin, PostMixin
-from .models import Category, Comment, Post, User
-from .service import get_posts
+from . import cursors, lookups, metrics, sitemaps, timeline, trending
+from .constants import EXPORT_CONTENT_TYPES, POST_LIST_LEN, TRENDING_LEN
+from .export import EXPORTS, iter_export
+from .forms import CommentForm, ExportFilterForm, PostForm, UserProfileForm
+from .mixins import (CommentMixin, FeedBatchMixin, OnlyAuthorMixin,
+                     PostListMixin, PostMixin, RateLimitMixin)
+from .models import Comment, Post, User
+from .pagecache import PageCacheMixin
+from .service import get_posts, visible_posts
 
 
-class IndexView(PostListMixin, ListView):
+class IndexView(PageCacheMixin, PostListMixin, ListView):
     template_name = 'blog/index.html'
+    batch_url_name = 'blog:index_batch'
 
+    def get_cache_tags(self, context):
+        return super().get_cache_tags(context) | {'feed:index'}
 
-class CategoryPostsView(PostListMixin, ListView):
+
+class CategoryPostsView(PageCacheMixin, PostListMixin, ListView):
     template_name = 'blog/category.html'
+    batch_url_name = 'blog:category_posts_batch'
 
     def get_queryset(self):
-        self.category = get_object_or_404(
-            Category, slug=self.kwargs['category_slug'], is_published=True)
-        return super().get_queryset().filter(category=self.category)
+        self.category = lookups.published_category(
+            self.kwargs['category_slug'])
+        if self.category is None:
+            raise Http404
+        return super().get_queryset().filter(category_id=self.category.pk)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['category'] = self.category
         return context
 
+    def get_cache_tags(self, context):
+        return super().get_cache_tags(context) | {
+            f'category:{self.category.slug}'}
+
 
-class ProfileView(PostListMixin, ListView):
+class ProfileView(PageCacheMixin, PostListMixin, ListView):
     template_name = 'blog/profile.html'
+    batch_url_name = 'blog:profile_batch'
 
     def get_queryset(self):
         self.profile = get_object_or_404(
@@ -41,6 +62,92 @@ class ProfileView(PostListMixin, ListView):
         context['profile'] = self.profile
         return context
 
+    def bypass_page_cache(self):
+        # Владелец видит в профиле и свои неопубликованные посты.
+        return self.request.user.get_username() == self.kwargs['username']
+
+    def get_cache_tags(self, context):
+        return super().get_cache_tags(context) | {
+            f'author:{self.profile.pk}'}
+
+
+class IndexBatchView(FeedBatchMixin, IndexView):
+    pass
+
+
+class CategoryPostsBatchView(FeedBatchMixin, CategoryPostsView):
+    pass
+
+
+class ProfileBatchView(FeedBatchMixin, ProfileView):
+    pass
+
+
+class FollowingView(LoginRequiredMixin, ListView):
+    """Лента подписок, листается курсором ?cursor= без номеров страниц."""
+
+    template_name = 'blog/following.html'
+
+    def get_queryset(self):
+        try:
+            return timeline.page(
+                self.request.user, self.request.GET.get('cursor'))
+        except ValueError:
+            raise Http404('Некорректный курсор.')
+
+    def get_context_data(self, **kwargs):
+        posts = lookups.attach(self.object_list[:POST_LIST_LEN])
+        context = super().get_context_data(object_list=posts, **kwargs)
+        context['posts'] = posts
+        if len(self.object_list) > POST_LIST_LEN:
+            post = posts[-1]
+            context['next_url'] = (
+                reverse('blog:following_batch') + '?cursor='
+                + cursors.encode(post.pub_date, post.pk))
+        return context
+
+
+class FollowingBatchView(FollowingView):
+    template_name = 'includes/feed_batch.html'
+
+
+class FollowView(LoginRequiredMixin, View):
+    follow = True
+
+    def post(self, request, username):
+        author = get_object_or_404(User, username=username)
+        if author != request.user:
+            if self.follow:
+                timeline.follow(request.user, author)
+            else:
+                timeline.unfollow(request.user, author)
+        return redirect('blog:profile', username=username)
+
+
+class UnfollowView(FollowView):
+    follow = False
+
+
+class PopularView(PageCacheMixin, PostListMixin, ListView):
+    template_name = 'blog/popular.html'
+    paginate_by = None
+
+    def get_queryset(self):
+        self.window = self.kwargs.get('window', next(iter(
+            settings.TRENDING_WINDOWS)))
+        if self.window not in settings.TRENDING_WINDOWS:
+            raise Http404
+        return trending.top(self.window, TRENDING_LEN)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['window'] = self.window
+        context['windows'] = settings.TRENDING_WINDOWS
+        return context
+
+    def get_cache_tags(self, context):
+        return super().get_cache_tags(context) | {'feed:index'}
+
 
 class EditProfileView(LoginRequiredMixin, UpdateView):
     model = User
@@ -56,20 +163,20 @@ class EditProfileView(LoginRequiredMixin, UpdateView):
         )
 
 
-class PostCreateView(PostMixin, CreateView):
+class PostCreateView(PostMixin, RateLimitMixin, CreateView):
     def form_valid(self, form):
         form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class PostDeleteView(PostMixin, OnlyAuthorMixin, DeleteView):
+class PostDeleteView(PostMixin, RateLimitMixin, OnlyAuthorMixin, DeleteView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = PostForm(instance=self.object)
         return context
 
 
-class PostUpdateView(PostMixin, OnlyAuthorMixin, UpdateView):
+class PostUpdateView(PostMixin, RateLimitMixin, OnlyAuthorMixin, UpdateView):
     def handle_no_permission(self):
         return redirect('blog:post_detail', post_id=self.get_object().id)
 
@@ -77,7 +184,7 @@ class PostUpdateView(PostMixin, OnlyAuthorMixin, UpdateView):
         return reverse('blog:post_detail', kwargs={'post_id': self.object.pk})
 
 
-class PostDetailView(DetailView):
+class PostDetailView(PageCacheMixin, DetailView):
     model = Post
     template_name = 'blog/detail.html'
     pk_url_kwarg = 'post_id'
@@ -88,30 +195,54 @@ class PostDetailView(DetailView):
         obj = get_object_or_404(queryset, id=post_id)
         if obj.author != self.request.user:
             obj = get_object_or_404(get_posts(), id=post_id)
-        return obj
+        return lookups.attach([obj])[0]
 
     def get_queryset(self):
-        return super().get_queryset().select_related(
-            'author',
-            'category',
-            'location'
-        )
+        return super().get_queryset().select_related('author')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = self.object.comments.select_related('author')
+        context['comments'] = Comment.objects.tree(
+            self.object.pk).select_related('author')
         return context
 
+    def is_page_shared(self, context):
+        # Автор видит свой неопубликованный пост, остальные — нет.
+        return visible_posts().filter(pk=self.object.pk).exists()
+
+    def get_cache_tags(self, context):
+        return super().get_cache_tags(context) | {
+            f'author:{comment.author_id}' for comment in context['comments']}
+
 
-class CommentCreateView(LoginRequiredMixin, CreateView):
+class CommentCreateView(LoginRequiredMixin, RateLimitMixin, CreateView):
     model = Comment
     form_class = CommentForm
+    template_name = 'blog/comment.html'
+
+    def get_parent(self):
+        """Комментарий, на который отвечают (?parent=), или None.
+        На удалённый комментарий-заглушку ответить нельзя."""
+        parent_id = self.request.GET.get('parent')
+        if not parent_id:
+            return None
+        if not parent_id.isdigit():
+            raise Http404
+        return get_object_or_404(
+            Comment, pk=parent_id, post_id=self.kwargs['post_id'],
+            is_deleted=False)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['parent'] = self.get_parent()
+        return context
 
     def form_valid(self, form):
         post = get_object_or_404(Post, pk=self.kwargs['post_id'])
         form.instance.author = self.request.user
         form.instance.post = post
+        form.instance.parent = self.get_parent()
         return super().form_valid(form)
 
     def get_success_url(self):
@@ -121,9 +252,62 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
         )
 
 
-class CommentUpdateView(LoginRequiredMixin, CommentMixin, UpdateView):
+class CommentUpdateView(LoginRequiredMixin, RateLimitMixin, CommentMixin,
+                        UpdateView):
     pass
 
 
-class CommentDeleteView(LoginRequiredMixin, CommentMixin, DeleteView):
-    pass
+class CommentDeleteView(LoginRequiredMixin, RateLimitMixin, CommentMixin,
+                        DeleteView):
+    def delete(self, request, *args, **kwargs):
+        if not self.comment.replies.exists():
+            return super().delete(request, *args, **kwargs)
+        # Чужие ответы остаются на своих местах в ветке под заглушкой.
+        self.comment.text = ''
+        self.comment.is_deleted = True
+        self.comment.save(update_fields=('text', 'is_deleted'))
+        return redirect(self.get_success_url())
+
+
+class MetricsView(View):
+    def get(self, request):
+        if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+            raise PermissionDenied
+        return HttpResponse(metrics.render(),
+                            content_type='text/plain; version=0.0.4')
+
+
+class ExportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, kind):
+        if kind not in EXPORTS:
+            raise Http404
+        form = ExportFilterForm(request.GET)
+        if not form.is_valid():
+            return HttpResponseBadRequest(form.errors.as_text())
+        filters = form.cleaned_data
+        output_format = filters.pop('format') or 'ndjson'
+        response = StreamingHttpResponse(
+            iter_export(kind, output_format, **filters),
+            content_type=EXPORT_CONTENT_TYPES[output_format])
+        response['Content-Disposition'] = (
+            f'attachment; filename="{kind}.{output_format}"')
+        return response
+
+
+class SitemapIndexView(View):
+    def get(self, request):
+        path = sitemaps.get_index(request.build_absolute_uri('/')[:-1])
+        return FileResponse(open(path, 'rb'), content_type='application/xml')
+
+
+class SitemapChunkView(View):
+    def get(self, request, section, chunk):
+        if (section not in sitemaps.SECTIONS
+                or not sitemaps.chunk_exists(section, chunk)):
+            raise Http404
+        path = sitemaps.get_chunk(
+            section, chunk, request.build_absolute_uri('/')[:-1])
+        return FileResponse(open(path, 'rb'), content_type='application/xml')
@@ -0,0 +1,35 @@
+"""Маршруты для ASGI: ленты, пост и статические страницы обслуживаются
+асинхронными представлениями, остальное — как в blogicum.urls."""
+from django.urls import include, path
+
+from blog import async_views
+from blog import urls as blog_urls
+from pages import urls as pages_urls
+from pages.views import AboutPage, RulesPage
+
+from . import urls
+
+handler404 = urls.handler404
+handler500 = urls.handler500
+
+blog_patterns = [
+    path('posts/<int:post_id>/',
+         async_views.post_detail, name='post_detail'),
+    path('category/<slug:category_slug>/',
+         async_views.category_posts, name='category_posts'),
+    path('', async_views.index, name='index'),
+] + blog_urls.urlpatterns
+
+pages_patterns = [
+    path('about/', async_views.as_async_view(AboutPage), name='about'),
+    path('rules/', async_views.as_async_view(RulesPage), name='rules'),
+] + pages_urls.urlpatterns
+
+urlpatterns = [
+    path('pages/', include((pages_patterns, 'pages'))),
+    *[
+        pattern for pattern in urls.urlpatterns
+        if getattr(pattern, 'namespace', None) not in ('blog', 'pages')
+    ],
+    path('', include((blog_patterns, 'blog'))),
+]
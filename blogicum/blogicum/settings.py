@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -26,6 +27,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.metrics_middleware',
+    'blog.middleware.read_replica_middleware',
+    'blog.middleware.scheduler_middleware',
+    'blog.middleware.view_counter_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -33,10 +38,15 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.middleware.asgi_urlconf_middleware',
 ]
 
 ROOT_URLCONF = 'blogicum.urls'
 
+ASGI_URLCONF = 'blogicum.asgi_urls'
+
+ASYNC_DB_WORKERS = 8
+
 TEMPLATES_DIR = BASE_DIR / 'templates'
 
 TEMPLATES = [
@@ -59,11 +69,56 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'blogicum.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'cached_statements': 256,
+        },
+        'PRAGMAS': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,
+            'cache_size': -32768,
+            'mmap_size': 134217728,
+            'temp_store': 'MEMORY',
+        },
+        'BUSY_RETRIES': 5,
+        'BUSY_BACKOFF': 0.05,
+        'IMMEDIATE_TRANSACTIONS': True,
     }
 }
 
+# Реплика для чтения включается переменной окружения: путь ко второму
+# файлу SQLite или read-only URI того же файла, например
+# file:/path/to/db.sqlite3?mode=ro
+READ_REPLICA_ALIAS = 'replica'
+if os.getenv('BLOGICUM_READ_REPLICA'):
+    DATABASES[READ_REPLICA_ALIAS] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('BLOGICUM_READ_REPLICA'),
+        'PRAGMAS': {
+            'query_only': 'ON',
+            'busy_timeout': 5000,
+            'cache_size': -32768,
+            'mmap_size': 134217728,
+            'temp_store': 'MEMORY',
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['blog.routers.PrimaryReplicaRouter']
+
+REPLICA_VIEWS = (
+    'blog:index',
+    'blog:category_posts',
+    'blog:profile',
+    'blog:post_detail',
+    'pages:about',
+    'pages:rules',
+)
+
+READ_REPLICA_STICKY_SECONDS = 10
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -98,8 +153,96 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = 'blog.mail.QueuedEmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
+# Очередь писем: send_queued_mail доставляет их через EMAIL_QUEUE_BACKEND.
+EMAIL_QUEUE_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_OUTBOX_PATH = BASE_DIR / 'outbox'
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+EMAIL_QUEUE_RETRY_DELAY = 60
+
+AUTHENTICATION_BACKENDS = ['blog.backends.CachedModelBackend']
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 LOGIN_REDIRECT_URL = 'blog:index'
 LOGIN_URL = 'login'
+
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+
+# LocMemCache годится для одного процесса. При нескольких воркерах нужен
+# общий кеш (Redis, Memcached, база данных): иначе сброс версий тегов и
+# пользователей сессий не доходит до остальных процессов.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blogicum',
+        # По умолчанию 300: страницы, ленты, версии тегов и ответы API
+        # вытесняли бы друг друга.
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# Пользователь сессии кешируется, только если CACHES общий для процессов
+# (не LocMemCache): иначе смену пароля в одном процессе не увидят другие.
+USER_CACHE_TIMEOUT = 900
+
+# Сколько секунд процесс доверяет снимку категорий и местоположений.
+# Смена версии тега видна другим процессам только через общий CACHES;
+# с LocMemCache они узнают о скрытии категории не позже этого срока.
+LOOKUPS_MAX_AGE = 30
+
+SCHEDULER_RELOAD_SECONDS = 60
+
+# Просмотры постов копятся в памяти и пишутся в базу раз в столько секунд.
+VIEW_COUNTER_FLUSH_SECONDS = 30
+
+# Популярное: окно -> постоянная времени затухания счёта в секундах.
+TRENDING_WINDOWS = {'24h': 24 * 60 * 60, '7d': 7 * 24 * 60 * 60}
+# Вес одного события в счёте поста.
+TRENDING_WEIGHTS = {'view': 1, 'comment': 10}
+# Как часто счета умножаются на множитель затухания и сколько остаётся
+# счёту, прежде чем его строка удаляется.
+TRENDING_DECAY_SECONDS = 5 * 60
+TRENDING_MIN_SCORE = 0.01
+
+# Авторы, у которых столько подписчиков или больше, не рассылают посты
+# по лентам подписок: их посты подмешиваются при чтении ленты.
+TIMELINE_FANOUT_MAX_FOLLOWERS = 1000
+
+# memory — окно в памяти процесса, cache — общее окно в CACHES.
+RATELIMIT_BACKEND = 'memory'
+
+# Попыток входа и регистрации: (количество, окно в секундах).
+AUTH_RATE_LIMITS = {
+    'ip': (20, 300),
+    'username': (10, 300),
+    'global': (300, 60),
+}
+
+# Записи по маршрутам: корзина -> (токенов в секунду, ёмкость).
+WRITE_RATE_LIMITS = {
+    'blog:create_post': {'user': (1 / 60, 10), 'ip': (1 / 20, 30)},
+    'blog:edit_post': {'user': (1 / 5, 20), 'ip': (1 / 2, 60)},
+    'blog:delete_post': {'user': (1 / 5, 20), 'ip': (1 / 2, 60)},
+    'blog:add_comment': {'user': (1 / 10, 20), 'ip': (1 / 5, 60)},
+    'blog:edit_comment': {'user': (1 / 5, 20), 'ip': (1 / 2, 60)},
+    'blog:delete_comment': {'user': (1 / 5, 20), 'ip': (1 / 2, 60)},
+}
+
+# Инвалидация тегов кеша откладывается до фиксации транзакции.
+CACHE_INVALIDATE_ON_COMMIT = True
+
+PAGE_CACHE_ENABLED = True
+# Страница свежая SOFT_TTL секунд, после этого отдаётся устаревшей, пока
+# один обработчик её перестраивает; из кеша удаляется через HARD_TTL.
+PAGE_CACHE_SOFT_TTL = 60
+PAGE_CACHE_HARD_TTL = 60 * 60
+PAGE_CACHE_LOCK_LEASE = 30
+
+FEED_CACHE_TIMEOUT = 60 * 15
+
+SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+SITEMAP_CHUNK_SIZE = 50000
+SITEMAP_MAX_AGE = 60 * 60
@@ -0,0 +1,82 @@
+"""SQLite с PRAGMA из настроек, BEGIN IMMEDIATE и повтором при SQLITE_BUSY.
+
+Настраивается дополнительными ключами в DATABASES:
+
+    'PRAGMAS': {'journal_mode': 'WAL', ...},
+    'BUSY_RETRIES': 5,
+    'BUSY_BACKOFF': 0.05,
+    'IMMEDIATE_TRANSACTIONS': True,
+"""
+import random
+import time
+
+from django.db.backends.sqlite3 import base
+
+Database = base.Database
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -32768,
+    'mmap_size': 134217728,
+    'temp_store': 'MEMORY',
+}
+
+BUSY_MESSAGES = ('database is locked', 'database table is locked')
+BACKOFF_CAP = 1.0
+
+
+def is_busy(error):
+    return any(message in str(error) for message in BUSY_MESSAGES)
+
+
+class SQLiteCursorWrapper(base.SQLiteCursorWrapper):
+    retries = 0
+    backoff = 0.0
+
+    def _retry(self, method, *args):
+        attempt = 0
+        while True:
+            try:
+                return method(self, *args)
+            except Database.OperationalError as error:
+                # Внутри транзакции повтор одного оператора не поможет:
+                # снимок уже устарел, откатывать должен вызывающий код.
+                if (not is_busy(error) or attempt >= self.retries
+                        or self.connection.in_transaction):
+                    raise
+            delay = min(self.backoff * 2 ** attempt, BACKOFF_CAP)
+            time.sleep(delay * random.uniform(0.5, 1.0))
+            attempt += 1
+
+    def execute(self, query, params=None):
+        return self._retry(base.SQLiteCursorWrapper.execute, query, params)
+
+    def executemany(self, query, param_list):
+        return self._retry(
+            base.SQLiteCursorWrapper.executemany, query, param_list)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = self.settings_dict.get('PRAGMAS', DEFAULT_PRAGMAS)
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=SQLiteCursorWrapper)
+        cursor.retries = self.settings_dict.get('BUSY_RETRIES', 5)
+        cursor.backoff = self.settings_dict.get('BUSY_BACKOFF', 0.05)
+        return cursor
+
+    def _start_transaction_under_autocommit(self):
+        # BEGIN IMMEDIATE берёт блокировку записи сразу и ждёт её по
+        # busy_timeout, а не падает при попытке повысить блокировку
+        # чтения посреди транзакции.
+        if self.settings_dict.get('IMMEDIATE_TRANSACTIONS', True):
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super()._start_transaction_under_autocommit()
@@ -2,25 +2,32 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.views import LoginView
 from django.urls import include, path, reverse_lazy
 from django.views.generic.edit import CreateView
 
+from blog.ratelimit import limit_auth
+from blog.views import MetricsView
+
 handler404 = 'pages.views.page_not_found'
 handler500 = 'pages.views.internal_error'
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('pages/', include('pages.urls', namespace='pages')),
+    path('auth/login/',
+         limit_auth('login')(LoginView.as_view()), name='login'),
     path('auth/', include('django.contrib.auth.urls')),
     path(
         'auth/registration/',
-        CreateView.as_view(
+        limit_auth('registration')(CreateView.as_view(
             template_name='registration/registration_form.html',
             form_class=UserCreationForm,
             success_url=reverse_lazy('blog:index'),
-        ),
+        )),
         name='registration',
     ),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     path('', include('blog.urls', namespace='blog')),
 ]
 
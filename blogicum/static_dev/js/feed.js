@@ -0,0 +1,46 @@
+// Бесконечная прокрутка лент: когда метка .feed-more появляется на
+// экране, следующая пачка карточек подгружается с адреса data-next и
+// вставляется на место метки. Без JavaScript остаётся пагинатор.
+(function () {
+  'use strict';
+
+  function load(marker, observer) {
+    observer.unobserve(marker);
+    fetch(marker.dataset.next, {credentials: 'same-origin'})
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.statusText);
+        }
+        return response.text();
+      })
+      .then(function (html) {
+        var batch = document.createRange().createContextualFragment(html);
+        var next = batch.querySelector('.feed-more');
+        marker.replaceWith(batch);
+        if (next) {
+          observer.observe(next);
+        }
+      })
+      .catch(function () {
+        observer.observe(marker);
+      });
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    var marker = document.querySelector('.feed-more');
+    if (!marker || !('IntersectionObserver' in window)) {
+      return;
+    }
+    document.querySelectorAll('.pagination').forEach(function (nav) {
+      nav.closest('nav').hidden = true;
+    });
+    var observer = new IntersectionObserver(function (entries) {
+      entries.forEach(function (entry) {
+        if (entry.isIntersecting) {
+          load(entry.target, observer);
+        }
+      });
+    }, {rootMargin: '600px'});
+    observer.observe(marker);
+  });
+})();
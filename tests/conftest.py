@@ -96,6 +96,33 @@ pytest_plugins = [
 ]
 
 
+@pytest.fixture(autouse=True)
+def cache_settings(settings):
+    # Тест выполняется в транзакции, которая не фиксируется, а откат не
+    # вызывает сигналов: кеш от предыдущего теста нужно очистить.
+    from django.core.cache import cache
+    cache.clear()
+    settings.CACHE_INVALIDATE_ON_COMMIT = False
+    # Ответ из кеша страниц не несёт response.context, который
+    # проверяют тесты представлений; кеш проверяется в test_pagecache.
+    settings.PAGE_CACHE_ENABLED = False
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    from blog import ratelimit
+    ratelimit.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_view_counter():
+    # Несброшенные просмотры записались бы в базу при выходе из pytest.
+    from blog import counters
+    counters.views.reset()
+    yield
+    counters.views.reset()
+
+
 @pytest.fixture
 def mixer():
     return _mixer
@@ -0,0 +1,133 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def category(mixer):
+    return mixer.blend('blog.Category', is_published=True)
+
+
+@pytest.fixture
+def posts(mixer, user, category):
+    location = mixer.blend('blog.Location', is_published=True)
+    now = timezone.now()
+    return [
+        mixer.blend('blog.Post', author=user, category=category,
+                    location=location, is_published=True, image='',
+                    pub_date=now - timedelta(hours=index))
+        for index in range(5)]
+
+
+def collect(client, url):
+    results = []
+    while url:
+        data = client.get(url).json()
+        results += data['results']
+        url = data['next']
+    return results
+
+
+def test_post_list_with_cursor(client, mixer, posts, user):
+    hidden = mixer.blend('blog.Post', author=user, is_published=False)
+    results = collect(client, '/api/posts/?limit=2')
+    assert [post['id'] for post in results] == [post.id for post in posts]
+    assert hidden.id not in {post['id'] for post in results}
+    first = results[0]
+    assert first['author'] == user.username
+    assert first['category'] == posts[0].category.slug
+    assert first['location'] == posts[0].location.name
+    assert first['comment_count'] == 0
+
+
+def test_sparse_fields_select_only_columns(client, posts):
+    with CaptureQueriesContext(connection) as queries:
+        data = client.get('/api/posts/?fields=id,title').json()
+    assert data['results'][0] == {'id': posts[0].id, 'title': posts[0].title}
+    sql = next(query['sql'] for query in queries
+               if 'FROM "blog_post"' in query['sql'])
+    assert '"blog_post"."text"' not in sql
+    assert 'JOIN' not in sql
+
+
+@pytest.mark.parametrize('query', (
+    'fields=id,secret', 'limit=0', 'limit=abc', 'cursor=oops',
+    'cursor=999999999999999999999_1', 'cursor=1_99999999999999999999999'))
+def test_bad_parameters(client, posts, query):
+    response = client.get(f'/api/posts/?{query}')
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert 'detail' in response.json()
+
+
+def test_etag_changes_with_content(client, posts):
+    etag = client.get('/api/posts/')['ETag']
+    response = client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    posts[0].title = 'Новый заголовок'
+    posts[0].save()
+    response = client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['results'][0]['title'] == 'Новый заголовок'
+
+
+@pytest.mark.parametrize('url', ('/api/posts/', '/api/authors/{}/posts/'))
+def test_etag_tracks_comments_and_author(client, mixer, posts, user, url):
+    url = url.format(user.username)
+    etag = client.get(url)['ETag']
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert not any('FROM "blog_post"' in query['sql'] for query in queries)
+
+    mixer.blend('blog.Comment', post=posts[0], author=user)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['results'][0]['comment_count'] == 1
+
+    etag = response['ETag']
+    user.first_name = 'Новое имя'
+    user.save()
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == (
+        HTTPStatus.OK)
+
+
+def test_detail_and_comments(client, mixer, posts, user):
+    post = posts[0]
+    comments = mixer.cycle(3).blend('blog.Comment', post=post, author=user)
+    assert client.get(f'/api/posts/{post.id}/').json()['id'] == post.id
+    results = collect(client, f'/api/posts/{post.id}/comments/?limit=2')
+    assert [comment['id'] for comment in results] == [
+        comment.id for comment in comments]
+
+    post.is_published = False
+    post.save()
+    for url in (f'/api/posts/{post.id}/', f'/api/posts/{post.id}/comments/'):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert response['Content-Type'] == 'application/json'
+
+
+def test_category_and_author_feeds(client, mixer, posts, category, user):
+    other = mixer.blend('blog.Post', is_published=True,
+                        category=mixer.blend('blog.Category',
+                                             is_published=True))
+    expected = [post.id for post in posts]
+    for url in (f'/api/categories/{category.slug}/posts/',
+                f'/api/authors/{user.username}/posts/'):
+        assert [post['id'] for post in collect(client, url)] == expected
+    slugs = [item['slug'] for item in client.get(
+        '/api/categories/?fields=slug').json()['results']]
+    assert slugs == [category.slug, other.category.slug]
+    assert client.get('/api/authors/nobody/posts/').status_code == (
+        HTTPStatus.NOT_FOUND)
+
+
+def test_read_only(client, posts):
+    response = client.post('/api/posts/')
+    assert response.status_code == HTTPStatus.METHOD_NOT_ALLOWED
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+from http import HTTPStatus
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import resolve
+
+from blog import async_views, metrics
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def async_get(settings):
+    settings.ASYNC_DB_WORKERS = 0
+    return async_to_sync(AsyncClient().get)
+
+
+@pytest.mark.parametrize('url', (
+    '/', '/category/slug/', '/posts/1/', '/pages/about/', '/pages/rules/'))
+def test_asgi_read_views_are_async(settings, url):
+    match = resolve(url, urlconf=settings.ASGI_URLCONF)
+    assert asyncio.iscoroutinefunction(match.func)
+    assert not asyncio.iscoroutinefunction(resolve(url).func)
+
+
+@pytest.mark.parametrize('url', ('/', '/pages/about/', '/pages/rules/'))
+def test_async_pages(async_get, url):
+    assert async_get(url).status_code == HTTPStatus.OK
+
+
+def test_async_post_views(async_get, post_with_published_location):
+    post = post_with_published_location
+    for url in ('/', f'/category/{post.category.slug}/',
+                f'/posts/{post.id}/'):
+        response = async_get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert post.title in response.content.decode()
+
+
+def test_async_views_return_404(async_get, future_posts):
+    assert async_get('/category/missing/').status_code == (
+        HTTPStatus.NOT_FOUND)
+    assert async_get(f'/posts/{future_posts[0].id}/').status_code == (
+        HTTPStatus.NOT_FOUND)
+    assert async_get('/?page=100').status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db(transaction=True)
+def test_db_pool_and_page_cache(settings, post_with_published_location):
+    settings.ASYNC_DB_WORKERS = 2
+    settings.PAGE_CACHE_ENABLED = True
+    metrics.reset()
+    threads = []
+    call = async_views._call
+
+    def record_thread(func, *args):
+        threads.append(threading.current_thread().name)
+        return call(func, *args)
+
+    get = async_to_sync(AsyncClient().get)
+    with mock.patch.object(async_views, '_call', record_thread):
+        for _ in range(2):
+            response = get('/')
+            assert post_with_published_location.title in (
+                response.content.decode())
+    assert all(name.startswith('blogicum-db') for name in threads)
+    assert len(threads) == 2
+    assert ('blogicum_page_cache_requests_total{view="blog:index",'
+            'result="hit"} 1') in metrics.render()
@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+from blog import bench
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_bench_covers_all_routes():
+    bench.seed(users=3, posts=30, comments=20, categories=2, locations=2)
+    assert Post.objects.count() == 30
+    assert Comment.objects.count() == 20
+    results = bench.run_routes(requests=2, warmup=0)
+    for name, stats in results.items():
+        assert stats['status'] in (200, 302), name
+        assert stats['p50_ms'] <= stats['p99_ms']
+        assert stats['queries'] >= 0
+    diff = bench.compare(results, results)
+    assert diff['blog:index']['p50_ms'] == 0
+
+
+def test_bench_is_not_throttled(settings):
+    settings.WRITE_RATE_LIMITS = {
+        'blog:add_comment': {'user': (1 / 3600, 1)},
+    }
+    bench.seed(users=2, posts=5, comments=2, categories=1, locations=1)
+    results = bench.run_routes(requests=3, warmup=0)
+    assert results['blog:add_comment']['status'] == 302
+    assert results['blog:add_comment']['rejected'] == {}
+    assert settings.WRITE_RATE_LIMITS['blog:add_comment']
+
+
+def test_load_worker_reports_rejected_separately():
+    deadline = time.perf_counter() + 0.2
+    durations, rejected, errors = bench._load_worker(
+        '/posts/999999/', deadline)
+    assert durations == []
+    assert rejected[404] > 0
+    assert errors == 0
@@ -0,0 +1,45 @@
+import io
+import json
+
+import pytest
+
+from blog.loader import BulkLoader, iter_objects
+from blog.models import Comment, Post
+
+DUMP = [
+    {'model': 'blog.comment', 'pk': 1, 'fields': {
+        'text': 'Комментарий', 'post': 1, 'author': 1,
+        'created_at': '2022-12-18T23:06:18.993Z'}},
+    {'model': 'auth.user', 'pk': 1, 'fields': {
+        'username': 'loader', 'password': 'x',
+        'date_joined': '2022-12-18T22:58:46Z'}},
+    {'model': 'blog.category', 'pk': 1, 'fields': {
+        'title': 'Категория', 'description': 'Описание', 'slug': 'loader',
+        'is_published': True, 'created_at': '2022-12-18T23:03:52Z'}},
+    {'model': 'blog.post', 'pk': 1, 'fields': {
+        'title': 'Заголовок', 'text': 'Текст', 'author': 1, 'category': 1,
+        'location': None, 'pub_date': '2022-12-18T23:06:18Z',
+        'is_published': True, 'created_at': '2022-12-18T23:06:18Z'}},
+]
+
+
+@pytest.mark.parametrize('text', [
+    json.dumps(DUMP, indent=2),
+    '\n'.join(json.dumps(obj) for obj in DUMP),
+], ids=['json', 'jsonl'])
+def test_iter_objects_streams_json_and_jsonl(text):
+    assert list(iter_objects(io.StringIO(text), chunk_size=16)) == DUMP
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bulk_loader_ignores_file_order():
+    counts, seconds = BulkLoader(batch_size=2).load(
+        io.StringIO(json.dumps(DUMP)))
+    assert counts['blog.Post'] == 1
+    post = Post.objects.get()
+    assert post.author.username == 'loader'
+    assert post.category.slug == 'loader'
+    assert Comment.objects.get().post == post
+    assert Post.objects.create(
+        title='Новый', text='Текст', author=post.author,
+        pub_date=post.pub_date).pk == 2
@@ -0,0 +1,68 @@
+import pytest
+from django.db import transaction
+
+from blog import cache
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.cache.clear()
+
+
+def test_tagged_entry_expires_with_any_tag():
+    cache.set_tagged('page', 'body', ['post:1', 'author:2'])
+    assert cache.get_tagged('page') == 'body'
+    cache.invalidate('author:3')
+    assert cache.get_tagged('page') == 'body'
+    cache.invalidate('author:2')
+    assert cache.get_tagged('page') is None
+
+
+@pytest.mark.parametrize('change, tag', (
+    (lambda post: post.category.save(), 'category'),
+    (lambda post: post.location.save(), 'location'),
+    (lambda post: post.author.save(), 'author'),
+    (lambda post: post.comments.create(author=post.author, text='Текст'),
+     'post'),
+    (lambda post: post.save(), 'post'),
+))
+def test_model_changes_invalidate_tags(
+        post_with_published_location, change, tag):
+    post = post_with_published_location
+    tags = {'post': f'post:{post.pk}',
+            'category': f'category:{post.category.slug}',
+            'author': f'author:{post.author_id}',
+            'location': f'location:{post.location_id}'}
+    for name in tags.values():
+        cache.set_tagged(name, 'value', [name])
+    change(post)
+    assert cache.get_tagged(tags[tag]) is None
+
+
+def test_invalidations_coalesced_until_commit(
+        settings, post_with_published_location,
+        django_capture_on_commit_callbacks):
+    settings.CACHE_INVALIDATE_ON_COMMIT = True
+    post = post_with_published_location
+    cache.set_tagged('detail', 'body', [f'post:{post.pk}'])
+    with django_capture_on_commit_callbacks() as callbacks:
+        post.save()
+        post.comments.create(author=post.author, text='Текст')
+        assert cache.get_tagged('detail') == 'body'
+    assert len(callbacks) == 1
+    callbacks[0]()
+    assert cache.get_tagged('detail') is None
+
+
+def test_rolled_back_invalidations_are_dropped(
+        settings, django_capture_on_commit_callbacks):
+    settings.CACHE_INVALIDATE_ON_COMMIT = True
+    with django_capture_on_commit_callbacks() as callbacks:
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                cache.invalidate('post:1')
+                raise RuntimeError
+        cache.invalidate('post:2')
+    assert [set(callback) for callback in callbacks] == [{'post:2'}]
@@ -0,0 +1,130 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.constants import COMMENT_MAX_DEPTH
+from blog.models import Comment
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def post(post_with_published_location):
+    return post_with_published_location
+
+
+def reply(post, author, text, parent=None):
+    return Comment.objects.create(
+        post=post, author=author, text=text, parent=parent)
+
+
+@pytest.fixture
+def tree(post, user):
+    first = reply(post, user, 'Первый')
+    second = reply(post, user, 'Второй')
+    answer = reply(post, user, 'Ответ на первый', first)
+    reply(post, user, 'Ответ на ответ', answer)
+    third = reply(post, user, 'Третий')
+    return first, second, third
+
+
+def texts(comments):
+    return [comment.text for comment in comments]
+
+
+def texts_of(data):
+    return [item['text'] for item in data['results']]
+
+
+def test_reply_form(user_client, post, tree):
+    url = f'/posts/add_comment/{post.id}/?parent={tree[1].id}'
+    assert tree[1].text in user_client.get(url).content.decode()
+    user_client.post(url, {'text': 'Ответ на второй'})
+    created = Comment.objects.get(text='Ответ на второй')
+    assert created.parent == tree[1]
+    assert created.depth == 1
+
+    other = reply(post.__class__.objects.create(
+        title='Другой', text='Другой', author=post.author,
+        pub_date=post.pub_date), post.author, 'Чужой')
+    response = user_client.post(
+        f'/posts/add_comment/{post.id}/?parent={other.id}', {'text': 'x'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_detail_renders_tree_in_one_query(client, post, tree):
+    with CaptureQueriesContext(connection) as queries:
+        content = client.get(f'/posts/{post.id}/').content.decode()
+    positions = [content.index(text) for text in (
+        'Первый', 'Ответ на первый', 'Ответ на ответ', 'Второй', 'Третий')]
+    assert positions == sorted(positions)
+    assert 'margin-left: 4rem' in content
+    assert sum('FROM "blog_comment"' in query['sql']
+               for query in queries) == 1
+
+
+def test_threads_page(post, tree, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        page = texts(Comment.objects.threads(post.id, limit=1))
+    assert page == ['Первый', 'Ответ на первый', 'Ответ на ответ']
+    assert texts(Comment.objects.threads(
+        post.id, after=tree[0].path, limit=5)) == ['Второй', 'Третий']
+
+
+def test_depth_is_limited(post, user):
+    comment = reply(post, user, 'Корень')
+    for _ in range(COMMENT_MAX_DEPTH + 3):
+        comment = reply(post, user, 'Ответ', comment)
+    assert comment.depth == COMMENT_MAX_DEPTH - 1
+    assert comment.parent.depth == COMMENT_MAX_DEPTH - 2
+
+
+def test_api_pages_by_thread(client, post, tree):
+    data = client.get(f'/api/posts/{post.id}/comments/?limit=1').json()
+    assert [(item['text'], item['depth']) for item in data['results']] == [
+        ('Первый', 0), ('Ответ на первый', 1), ('Ответ на ответ', 2)]
+    data = client.get(data['next']).json()
+    assert texts_of(data) == ['Второй']
+    assert texts_of(client.get(data['next']).json()) == ['Третий']
+
+
+def test_deleting_comment_keeps_replies(
+        user_client, post, tree, another_user):
+    first, _, third = tree
+    reply(post, another_user, 'Чужой ответ', first)
+    user_client.post(f'/posts/{post.id}/delete_comment/{first.id}')
+    first.refresh_from_db()
+    assert first.is_deleted and first.text == ''
+    content = user_client.get(f'/posts/{post.id}/').content.decode()
+    assert 'Комментарий удалён' in content
+    assert 'Чужой ответ' in content and 'Ответ на ответ' in content
+    response = user_client.get(f'/posts/{post.id}/edit_comment/{first.id}')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+    user_client.post(f'/posts/{post.id}/delete_comment/{third.id}')
+    assert not Comment.objects.filter(pk=third.pk).exists()
+
+
+def test_deleted_comment_hidden_in_api_and_closed_for_replies(
+        user_client, client, post, tree, another_user):
+    first = tree[0]
+    reply(post, another_user, 'Чужой ответ', first)
+    user_client.post(f'/posts/{post.id}/delete_comment/{first.id}')
+    data = client.get(f'/api/posts/{post.id}/comments/?limit=1').json()
+    placeholder = data['results'][0]
+    assert placeholder['id'] == first.id and placeholder['deleted']
+    assert (placeholder['author'], placeholder['text']) == (None, None)
+    assert all(item['author'] for item in data['results'][1:])
+    response = user_client.post(
+        f'/posts/add_comment/{post.id}/?parent={first.id}', {'text': 'Ответ'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_orphaned_replies_stay_in_threads(post, tree):
+    first = tree[0]
+    first.delete()
+    assert Comment.objects.filter(parent__isnull=True).count() == 3
+    assert texts(Comment.objects.threads(post.id, limit=1)) == [
+        'Ответ на первый', 'Ответ на ответ', 'Второй']
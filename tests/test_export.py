@@ -0,0 +1,57 @@
+import csv
+import io
+import json
+from http import HTTPStatus
+
+import pytest
+from django.test import Client
+
+from blog.export import iter_export
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def staff_client(mixer):
+    client = Client()
+    client.force_login(mixer.blend('auth.User', is_staff=True))
+    return client
+
+
+def test_export_is_staff_only(user_client):
+    response = user_client.get('/export/posts/')
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_export_posts_ndjson_filtered_by_author(
+        staff_client, post_with_published_location, post_of_another_author):
+    author = post_with_published_location.author.username
+    response = staff_client.get('/export/posts/', {'author': author})
+    assert response.status_code == HTTPStatus.OK
+    assert response.streaming
+    rows = [json.loads(line) for line in
+            b''.join(response.streaming_content).decode().splitlines()]
+    assert [row['id'] for row in rows] == [post_with_published_location.id]
+    assert rows[0]['author__username'] == author
+
+
+def test_export_comments_csv(staff_client, mixer):
+    comment = mixer.blend('blog.Comment')
+    response = staff_client.get('/export/comments/', {'format': 'csv'})
+    rows = list(csv.reader(io.StringIO(
+        b''.join(response.streaming_content).decode())))
+    assert rows[0] == ['id', 'post_id', 'author__username', 'text',
+                       'created_at']
+    assert rows[1][:2] == [str(comment.id), str(comment.post_id)]
+
+
+def test_export_rejects_bad_dates(staff_client):
+    response = staff_client.get('/export/posts/', {'since': 'вчера'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_export_rejects_unknown_format(staff_client):
+    response = staff_client.get('/export/posts/', {'format': 'xml'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    with pytest.raises(ValueError):
+        iter_export('posts', 'xml')
@@ -0,0 +1,73 @@
+import re
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+NEXT = re.compile(r'data-next="([^"]+)"')
+
+
+@pytest.fixture
+def category(mixer):
+    return mixer.blend('blog.Category', is_published=True)
+
+
+@pytest.fixture
+def posts(mixer, user, category):
+    now = timezone.now()
+    return [
+        mixer.blend('blog.Post', author=user, category=category,
+                    is_published=True, location=None,
+                    title=f'Пост номер {index:02d}',
+                    pub_date=now - timedelta(hours=index))
+        for index in range(25)]
+
+
+def scroll(client, url):
+    """Заголовки постов со страницы и всех следующих пачек."""
+    titles = []
+    content = client.get(url).content.decode()
+    while True:
+        titles += re.findall(r'Пост номер \d\d', content)
+        match = NEXT.search(content)
+        if match is None:
+            return titles
+        response = client.get(match.group(1).replace('&amp;', '&'))
+        assert response.status_code == HTTPStatus.OK
+        content = response.content.decode()
+        assert '<html' not in content
+
+
+@pytest.mark.parametrize('url', (
+    '/', '/category/{category.slug}/', '/profile/{user.username}/'))
+def test_batches_continue_feed(client, posts, category, user, url):
+    titles = scroll(client, url.format(category=category, user=user))
+    assert titles == [post.title for post in posts]
+
+
+def test_cursor_not_shifted_by_new_posts(client, mixer, posts, user):
+    first = client.get('/').content.decode()
+    mixer.blend('blog.Post', author=user, category=posts[0].category,
+                is_published=True, pub_date=timezone.now())
+    content = client.get(NEXT.search(first).group(1)).content.decode()
+    assert re.findall(r'Пост номер \d\d', content) == [
+        post.title for post in posts[10:20]]
+
+
+def test_batch_cached_per_cursor(
+        client, settings, posts, django_assert_num_queries):
+    settings.PAGE_CACHE_ENABLED = True
+    url = NEXT.search(client.get('/').content.decode()).group(1)
+    response = client.get(url)
+    with django_assert_num_queries(0):
+        assert client.get(url).content == response.content
+
+
+@pytest.mark.parametrize('cursor', (
+    'oops', '999999999999999999999_1', '1_99999999999999999999999'))
+def test_invalid_cursor(client, posts, cursor):
+    response = client.get(f'/batch/?cursor={cursor}')
+    assert response.status_code == HTTPStatus.NOT_FOUND
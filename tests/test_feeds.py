@@ -0,0 +1,59 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+def test_feeds_render(client, post_with_published_location):
+    post = post_with_published_location
+    for url in (
+        '/feeds/rss/',
+        '/feeds/atom/',
+        f'/feeds/category/{post.category.slug}/rss/',
+        f'/feeds/author/{post.author.username}/atom/',
+    ):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, url
+        assert post.title in response.content.decode(), url
+
+
+def test_feed_hides_invisible_posts(client, future_posts):
+    response = client.get('/feeds/rss/')
+    for post in future_posts:
+        assert post.title not in response.content.decode()
+
+
+def test_feed_cached_with_etag_and_invalidated(
+        client, django_assert_num_queries, post_with_published_location):
+    response = client.get('/feeds/rss/')
+    etag = response['ETag']
+    assert response['Last-Modified']
+    with django_assert_num_queries(0):
+        not_modified = client.get('/feeds/rss/', HTTP_IF_NONE_MATCH=etag)
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+    with django_assert_num_queries(0):
+        assert client.get('/feeds/rss/').content == response.content
+
+    post_with_published_location.title = 'Новый заголовок'
+    post_with_published_location.save()
+    response = client.get('/feeds/rss/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert 'Новый заголовок' in response.content.decode()
+
+
+def test_unknown_category_feed_is_404(client):
+    response = client.get('/feeds/category/unknown/rss/')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_feed_cached_per_host(client, post_with_published_location):
+    for host in ('localhost', '127.0.0.1'):
+        response = client.get('/feeds/rss/', HTTP_HOST=host)
+        assert f'http://{host}/posts/' in response.content.decode()
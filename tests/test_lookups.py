@@ -0,0 +1,78 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.lookups import attach, lookups
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def posts(mixer, user):
+    return [
+        mixer.blend('blog.Post', author=user, is_published=True,
+                    category=mixer.blend('blog.Category', is_published=True),
+                    location=mixer.blend('blog.Location', is_published=True))
+        for _ in range(3)]
+
+
+def test_feed_does_not_join_lookups(client, posts):
+    client.get('/')
+    with CaptureQueriesContext(connection) as queries:
+        content = client.get('/').content.decode()
+    for post in posts:
+        assert post.category.title in content
+        assert post.location.name in content
+    sql = ' '.join(query['sql'] for query in queries)
+    assert 'blog_category' not in sql
+    assert 'blog_location' not in sql
+
+
+def test_category_page_without_category_query(client, posts):
+    category = posts[0].category
+    client.get(f'/category/{category.slug}/')
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f'/category/{category.slug}/')
+    assert response.status_code == HTTPStatus.OK
+    assert posts[0].title in response.content.decode()
+    assert not any('blog_category' in query['sql'] for query in queries)
+
+
+def test_snapshot_refreshed_on_change(client, posts):
+    post = posts[0]
+    assert lookups.current().categories[post.category_id].title == (
+        post.category.title)
+    post.category.title = 'Новое название'
+    post.category.save()
+    assert lookups.current().categories[post.category_id].title == (
+        'Новое название')
+
+    post.category.is_published = False
+    post.category.save()
+    assert client.get(
+        f'/category/{post.category.slug}/').status_code == (
+            HTTPStatus.NOT_FOUND)
+    assert post.title not in client.get('/').content.decode()
+
+
+def test_unknown_keys_load_normally(posts, django_assert_num_queries):
+    post = posts[0]
+    post.refresh_from_db()
+    post.location_id = -1
+    attach([post])
+    with django_assert_num_queries(0):
+        assert post.category.title
+    assert 'location' not in post._state.fields_cache
+
+
+def test_snapshot_expires_without_tag_change(settings, posts):
+    category = posts[0].category
+    lookups.current()
+    # update() не шлёт сигналов: так выглядит изменение из другого
+    # процесса, когда у процессов нет общего кеша.
+    type(category).objects.filter(pk=category.pk).update(is_published=False)
+    assert category.pk in lookups.current().published_category_ids
+    settings.LOOKUPS_MAX_AGE = 0
+    assert category.pk not in lookups.current().published_category_ids
@@ -0,0 +1,92 @@
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.mail import send_mail
+from django.core.management import call_command
+
+from blog.smtp_sink import SMTPSink
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def sink(settings, tmp_path):
+    with SMTPSink() as sink:
+        settings.EMAIL_BACKEND = 'blog.mail.QueuedEmailBackend'
+        settings.EMAIL_QUEUE_BACKEND = (
+            'django.core.mail.backends.smtp.EmailBackend')
+        settings.EMAIL_HOST, settings.EMAIL_PORT = sink.host, sink.port
+        settings.EMAIL_OUTBOX_PATH = tmp_path
+        settings.EMAIL_QUEUE_RETRY_DELAY = 0
+        yield sink
+
+
+def pending(settings):
+    return list((settings.EMAIL_OUTBOX_PATH / 'pending').glob('*.msg'))
+
+
+def test_password_reset_is_queued_then_sent(client, user, sink, settings):
+    user.email = 'reader@example.com'
+    user.save()
+    response = client.post(
+        '/auth/password_reset/', {'email': 'reader@example.com'})
+    assert response.status_code == HTTPStatus.FOUND
+    assert sink.messages == []
+    assert len(pending(settings)) == 1
+    call_command('send_queued_mail')
+    assert [message['to'] for message in sink.messages] == [
+        ['reader@example.com']]
+    assert pending(settings) == []
+
+
+def test_batch_uses_one_connection(sink):
+    for index in range(3):
+        send_mail(f'Тема {index}', 'Текст', 'blog@example.com',
+                  [f'user{index}@example.com'])
+    call_command('send_queued_mail', batch_size=10)
+    assert sink.connections == 1
+    assert sorted(
+        message['message']['Subject'] for message in sink.messages
+    ) == ['Тема 0', 'Тема 1', 'Тема 2']
+
+
+def test_failed_message_is_retried(sink, settings):
+    sink.fail_next = 1
+    send_mail('Тема', 'Текст', 'blog@example.com', ['user@example.com'])
+    call_command('send_queued_mail')
+    assert sink.messages == []
+    [path] = pending(settings)
+    assert path.name.split('-')[1] == '1'
+    call_command('send_queued_mail')
+    assert len(sink.messages) == 1
+
+
+def test_message_dropped_after_max_attempts(sink, settings):
+    settings.EMAIL_QUEUE_MAX_ATTEMPTS = 1
+    sink.fail_next = 1
+    send_mail('Тема', 'Текст', 'blog@example.com', ['user@example.com'])
+    call_command('send_queued_mail')
+    assert pending(settings) == []
+    assert len(list((settings.EMAIL_OUTBOX_PATH / 'failed').iterdir())) == 1
+
+
+def test_loop_survives_smtp_outage(sink, settings):
+    send_mail('Тема', 'Текст', 'blog@example.com', ['user@example.com'])
+    port, settings.EMAIL_PORT = settings.EMAIL_PORT, 1
+    delays = []
+
+    def sleep(delay):
+        delays.append(delay)
+        if len(delays) == 2:
+            settings.EMAIL_PORT = port
+        elif len(delays) == 3:
+            raise KeyboardInterrupt
+
+    stderr = StringIO()
+    with mock.patch('time.sleep', sleep), pytest.raises(KeyboardInterrupt):
+        call_command('send_queued_mail', loop=1, stderr=stderr)
+    assert delays == [2, 4, 1]
+    assert 'Ошибка отправки' in stderr.getvalue()
+    assert len(sink.messages) == 1
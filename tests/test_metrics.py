@@ -0,0 +1,68 @@
+import gc
+import threading
+from http import HTTPStatus
+
+import pytest
+
+from blog import metrics
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_metrics_endpoint_labels_by_view_name(client):
+    metrics.reset()
+    client.get('/pages/about/')
+    client.get('/')
+    response = client.get('/metrics/')
+    assert response.status_code == HTTPStatus.OK
+    body = response.content.decode()
+    assert (
+        'blogicum_http_requests_total{view="pages:about",method="GET",'
+        'status="200"} 1' in body
+    ), 'Убедитесь, что счётчик запросов размечен по имени маршрута.'
+    assert 'blogicum_http_request_duration_seconds_bucket{view="blog:index"' \
+        in body
+    assert 'blogicum_db_queries_per_request_count{view="blog:index"} 1' \
+        in body
+    assert 'blogicum_http_response_size_bytes_sum{view="pages:about"}' in body
+
+
+def test_metrics_endpoint_restricted_by_ip(client):
+    response = client.get('/metrics/', REMOTE_ADDR='10.0.0.1')
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_per_thread_shards_are_merged():
+    metrics.reset()
+
+    def work():
+        for _ in range(100):
+            metrics.cache_access('page', hit=True)
+        metrics.cache_access('page', hit=False)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counters, _ = metrics.collect()
+    hits = counters['blogicum_cache_requests_total',
+                    (('cache', 'page'), ('result', 'hit'))]
+    assert hits == 400
+    assert 'blogicum_cache_hit_ratio{cache="page"} 0.99' in metrics.render()
+
+
+def test_finished_threads_fold_into_retired_shard():
+    metrics.reset()
+    metrics.inc('blogicum_emails_total')
+    shards = len(metrics._shards)
+    for _ in range(10):
+        thread = threading.Thread(target=metrics.observe, args=(
+            'blogicum_db_query_duration_seconds', 0.02))
+        thread.start()
+        thread.join()
+    gc.collect()
+    assert len(metrics._shards) == shards
+    counters, histograms = metrics.collect()
+    assert counters['blogicum_emails_total', ()] == 1
+    assert histograms['blogicum_db_query_duration_seconds', ()][2] == 10
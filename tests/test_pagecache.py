@@ -0,0 +1,127 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.test import RequestFactory
+
+from blog import metrics, pagecache
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def enable_page_cache(settings):
+    settings.PAGE_CACHE_ENABLED = True
+    metrics.reset()
+
+
+def page_results():
+    counters, _ = metrics.collect()
+    return {
+        dict(labels)['result']: value
+        for (name, labels), value in counters.items()
+        if name == 'blogicum_page_cache_requests_total'
+    }
+
+
+def test_anonymous_page_served_from_cache(
+        client, django_assert_num_queries, post_with_published_location):
+    response = client.get('/')
+    with django_assert_num_queries(0):
+        cached = client.get('/')
+    assert cached.status_code == HTTPStatus.OK
+    assert cached.content == response.content
+    assert page_results() == {'miss': 1, 'hit': 1}
+
+
+@pytest.mark.parametrize('url', ('/', '/posts/{id}/', '/category/{slug}/'))
+def test_cached_page_refreshed_after_change(
+        client, post_with_published_location, url):
+    post = post_with_published_location
+    url = url.format(id=post.id, slug=post.category.slug)
+    client.get(url)
+    post.title = 'Новый заголовок'
+    post.save()
+    assert 'Новый заголовок' in client.get(url).content.decode()
+    assert page_results()['refresh'] == 1
+
+
+def test_stale_page_served_while_lock_is_held(
+        client, post_with_published_location):
+    post = post_with_published_location
+    old_content = client.get('/').content
+    post.title = 'Новый заголовок'
+    post.save()
+    key = pagecache.page_key(RequestFactory().get('/'))
+    cache.add(pagecache.LOCK_PREFIX + key, 'other-worker')
+    assert client.get('/').content == old_content
+    cache.delete(pagecache.LOCK_PREFIX + key)
+    assert 'Новый заголовок' in client.get('/').content.decode()
+    assert page_results() == {'miss': 1, 'stale': 1, 'refresh': 1}
+    rendered = metrics.render()
+    assert 'blogicum_page_cache_locks_total{result="contended"} 1' in rendered
+
+
+def test_failed_revalidation_drops_stale_page(
+        client, post_with_published_location):
+    post = post_with_published_location
+    url = f'/posts/{post.id}/'
+    assert client.get(url).status_code == HTTPStatus.OK
+    post.is_published = False
+    post.save()
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+    key = pagecache.page_key(RequestFactory().get(url))
+    cache.add(pagecache.LOCK_PREFIX + key, 'other-worker')
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert post.title not in response.content.decode()
+
+
+def test_soft_ttl_expiry_triggers_refresh(client, settings):
+    settings.PAGE_CACHE_SOFT_TTL = 0
+    client.get('/')
+    client.get('/')
+    assert page_results() == {'miss': 1, 'refresh': 1}
+
+
+def test_shared_body_with_per_user_fragments(
+        client, user_client, another_user_client, user, another_user,
+        post_with_published_location):
+    post = post_with_published_location
+    post.author = user
+    post.save()
+    url = f'/posts/{post.id}/'
+    edit_url = f'/posts/{post.id}/edit/'
+
+    anonymous = client.get(url).content.decode()
+    assert edit_url not in anonymous
+    assert 'csrfmiddlewaretoken' not in anonymous
+    assert 'Войти' in anonymous
+
+    own = user_client.get(url).content.decode()
+    assert edit_url in own
+    assert 'csrfmiddlewaretoken' in own
+    assert f'/profile/{user.username}/' in own
+
+    other = another_user_client.get(url).content.decode()
+    assert edit_url not in other
+    assert f'/profile/{another_user.username}/' in other
+    assert '<!--punch:' not in anonymous + own + other
+    assert page_results() == {'miss': 1, 'hit': 2}
+
+
+def test_profile_owner_bypasses_cache(
+        user_client, client, user, mixer):
+    hidden = mixer.blend('blog.Post', author=user, is_published=False)
+    assert hidden.title not in client.get(
+        f'/profile/{user.username}/').content.decode()
+    assert hidden.title in user_client.get(
+        f'/profile/{user.username}/').content.decode()
+    assert page_results() == {'miss': 1}
+
+
+def test_author_only_post_is_not_shared(user_client, client, user, mixer):
+    hidden = mixer.blend('blog.Post', author=user, is_published=False)
+    url = f'/posts/{hidden.id}/'
+    assert user_client.get(url).status_code == HTTPStatus.OK
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,47 @@
+import re
+
+import pytest
+from django.core.paginator import Paginator
+from django.template import Context, Template
+
+from blog.views import IndexView
+
+pytestmark = [pytest.mark.django_db]
+
+
+def render(number, pages=1000):
+    page = Paginator(range(pages * 10), 10).page(number)
+    return Template('{% load pagination %}{% paginator page_obj %}').render(
+        Context({'page_obj': page}))
+
+
+def page_links(html):
+    return [int(number) for number in re.findall(
+        r'<(?:a|span) class="page-link"[^>]*>(\d+)</', html)]
+
+
+@pytest.mark.parametrize('number, expected', (
+    (1, [1, 2, 3, 1000]),
+    (500, [1, 498, 499, 500, 501, 502, 1000]),
+    (1000, [1, 998, 999, 1000]),
+))
+def test_window_around_current_page(number, expected):
+    html = render(number)
+    assert page_links(html) == expected
+    assert '…' in html
+    assert f'<span class="page-link">{number}</span>' in html
+
+
+def test_short_range_not_elided():
+    html = render(3, pages=5)
+    assert page_links(html) == [1, 2, 3, 4, 5]
+    assert '…' not in html
+
+
+def test_list_views_use_window(client, mixer, user, monkeypatch):
+    monkeypatch.setattr(IndexView, 'paginate_by', 1)
+    category = mixer.blend('blog.Category', is_published=True)
+    mixer.cycle(20).blend('blog.Post', author=user, category=category,
+                          is_published=True)
+    html = client.get('/?page=10').content.decode()
+    assert page_links(html) == [1, 8, 9, 10, 11, 12, 20]
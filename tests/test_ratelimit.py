@@ -0,0 +1,104 @@
+from http import HTTPStatus
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+
+from blog import metrics, ratelimit
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def limits(settings):
+    settings.AUTH_RATE_LIMITS = {
+        'ip': (5, 60), 'username': (2, 60), 'global': (100, 60)}
+    ratelimit.reset()
+    cache.clear()
+    metrics.reset()
+
+
+@pytest.mark.parametrize('backend', ('memory', 'cache'))
+def test_login_limited_by_username_before_hashing(client, settings, backend):
+    settings.RATELIMIT_BACKEND = backend
+    data = {'username': 'victim', 'password': 'wrong'}
+    for _ in range(2):
+        assert client.post('/auth/login/', data).status_code == HTTPStatus.OK
+    with mock.patch('blog.backends.CachedModelBackend.authenticate') as auth:
+        response = client.post('/auth/login/', data)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert int(response['Retry-After']) > 0
+    auth.assert_not_called()
+    response = client.post(
+        '/auth/login/', {'username': 'other', 'password': 'wrong'})
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_registration_limited_by_ip(client):
+    for index in range(5):
+        response = client.post(
+            '/auth/registration/', {'username': f'user{index}'})
+        assert response.status_code == HTTPStatus.OK
+    response = client.post('/auth/registration/', {'username': 'user5'})
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert client.get('/auth/registration/').status_code == HTTPStatus.OK
+    rendered = metrics.render()
+    assert ('blogicum_ratelimit_total{scope="registration",bucket="ip",'
+            'result="limited"} 1') in rendered
+
+
+def test_memory_window_slides():
+    window = ratelimit.MemorySlidingWindow()
+    assert window.hit('key', 2, 10, 0) == 0
+    assert window.hit('key', 2, 10, 5) == 0
+    assert window.hit('key', 2, 10, 6) == 4
+    assert window.hit('key', 2, 10, 10.5) == 0
+
+
+def test_memory_sweep_keeps_longer_windows(monkeypatch):
+    monkeypatch.setattr(ratelimit, 'MAX_MEMORY_KEYS', 1)
+    window = ratelimit.MemorySlidingWindow()
+    window.hit('ip', 1, 300, 0)
+    window.hit('global', 100, 60, 0)
+    window.hit('global', 100, 60, 100)
+    assert window.hit('ip', 1, 300, 100) > 0
+    with mock.patch.object(window, '_sweep') as sweep:
+        window.hit('other', 1, 60, 101)
+    sweep.assert_not_called()
+
+
+def test_token_bucket_refills():
+    bucket = ratelimit.MemoryTokenBucket()
+    assert bucket.take('key', 0.5, 2, 0) == 0
+    assert bucket.take('key', 0.5, 2, 0) == 0
+    assert bucket.take('key', 0.5, 2, 0) == 2
+    assert bucket.take('key', 0.5, 2, 2) == 0
+
+
+@pytest.mark.parametrize('backend', ('memory', 'cache'))
+def test_comment_creation_limited_per_user(
+        user_client, another_user_client, post_with_published_location,
+        settings, backend):
+    settings.RATELIMIT_BACKEND = backend
+    settings.WRITE_RATE_LIMITS = {
+        'blog:add_comment': {'user': (0.01, 2), 'ip': (0.01, 3)}}
+    url = f'/posts/add_comment/{post_with_published_location.id}/'
+    for _ in range(2):
+        response = user_client.post(url, {'text': 'Комментарий'})
+        assert response.status_code == HTTPStatus.FOUND
+    response = user_client.post(url, {'text': 'Комментарий'})
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert int(response['Retry-After']) > 0
+    assert post_with_published_location.comments.count() == 2
+    response = another_user_client.post(url, {'text': 'Комментарий'})
+    assert response.status_code == HTTPStatus.FOUND
+    response = another_user_client.post(url, {'text': 'Комментарий'})
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_get_requests_are_not_limited(
+        user_client, settings):
+    settings.WRITE_RATE_LIMITS = {
+        'blog:create_post': {'user': (0.01, 1)}}
+    for _ in range(3):
+        assert user_client.get('/posts/create/').status_code == HTTPStatus.OK
@@ -0,0 +1,108 @@
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+from django.db import connections
+from django.utils import timezone
+
+from blog import routers
+from blog.models import Comment, Post
+from blog.routers import STICKY_COOKIE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def make_request(view_name='blog:index', method='GET', cookies=None):
+    return SimpleNamespace(
+        method=method, COOKIES=cookies or {},
+        resolver_match=SimpleNamespace(view_name=view_name))
+
+
+@pytest.fixture
+def router(settings):
+    settings.READ_REPLICA_ALIAS = 'default'
+    return routers.PrimaryReplicaRouter()
+
+
+def test_reads_outside_requests_use_primary(router):
+    assert router.db_for_read(Post) is None
+
+
+def test_reads_go_to_replica_until_first_write(router):
+    token = routers.begin(make_request())
+    try:
+        assert router.db_for_read(Post) == 'default'
+        assert router.db_for_write(Post) == 'default'
+        assert router.db_for_read(Post) is None
+    finally:
+        routers.end(token)
+
+
+def test_unconfigured_replica_falls_back_to_primary(settings):
+    settings.READ_REPLICA_ALIAS = 'replica'
+    token = routers.begin(make_request())
+    try:
+        assert routers.PrimaryReplicaRouter().db_for_read(Post) is None
+    finally:
+        routers.end(token)
+
+
+@pytest.mark.parametrize('request_kwargs', (
+    {'method': 'POST'},
+    {'view_name': 'blog:create_post'},
+    {'cookies': {STICKY_COOKIE: '9999999999'}},
+))
+def test_replica_is_not_used(router, request_kwargs):
+    token = routers.begin(make_request(**request_kwargs))
+    try:
+        assert router.db_for_read(Post) is None
+    finally:
+        routers.end(token)
+
+
+def test_write_makes_client_sticky_to_primary(
+        user_client, post_with_published_location):
+    response = user_client.get('/')
+    assert STICKY_COOKIE not in response.cookies
+    response = user_client.post(
+        f'/posts/add_comment/{post_with_published_location.id}/',
+        {'text': 'Комментарий'})
+    assert STICKY_COOKIE in response.cookies
+
+
+@pytest.fixture
+def replica(transactional_db, settings, tmp_path, mixer):
+    """Вторая база SQLite в файле — копия основной на момент вызова."""
+    category = mixer.blend('blog.Category', is_published=True)
+    post = mixer.blend(
+        'blog.Post', category=category, is_published=True, image='',
+        title='Старый заголовок', pub_date=timezone.now())
+    connections['default'].ensure_connection()
+    path = tmp_path / 'replica.sqlite3'
+    target = sqlite3.connect(path)
+    connections['default'].connection.backup(target)
+    target.close()
+    connections.settings['replica'] = {
+        **connections['default'].settings_dict, 'NAME': str(path)}
+    settings.DATABASES = {**settings.DATABASES,
+                          'replica': connections.settings['replica']}
+    settings.READ_REPLICA_ALIAS = 'replica'
+    yield post
+    connections['replica'].close()
+    del connections['replica']
+    del connections.settings['replica']
+
+
+def test_two_sqlite_files(client, user, replica):
+    post = replica
+    Post.objects.filter(pk=post.pk).update(title='Новый заголовок')
+    content = client.get('/').content.decode()
+    assert 'Старый заголовок' in content
+
+    client.force_login(user)
+    response = client.post(
+        f'/posts/add_comment/{post.id}/', {'text': 'Комментарий'})
+    assert STICKY_COOKIE in response.cookies
+    assert Comment.objects.using('default').filter(post=post).exists()
+    assert not Comment.objects.using('replica').exists()
+    assert 'Новый заголовок' in client.get('/').content.decode()
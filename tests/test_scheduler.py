@@ -0,0 +1,76 @@
+import time
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from blog.cache import tag_versions
+from blog.scheduler import Scheduler
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def scheduled_post(mixer, user):
+    return mixer.blend(
+        'blog.Post', author=user, is_published=True,
+        category__is_published=True,
+        pub_date=timezone.now() + timedelta(hours=1))
+
+
+def scopes_of(post):
+    return ('feed:index', f'author:{post.author_id}',
+            f'category:{post.category.slug}')
+
+
+def test_go_live_bumps_exactly_affected_scopes(scheduled_post):
+    scheduler = Scheduler()
+    assert scheduler.pending()
+    assert scheduler.run_pending() == []
+    assert not scheduler.pending()
+    due = scheduled_post.pub_date.timestamp()
+    assert scheduler.next_due() == due
+    before = tag_versions(*scopes_of(scheduled_post), 'category:other')
+    assert scheduler.pending(now=due + 1)
+    assert scheduler.run_pending(now=due + 1) == [scheduled_post.pk]
+    after = tag_versions(*scopes_of(scheduled_post), 'category:other')
+    assert all(old != new for old, new in zip(before[:3], after[:3]))
+    assert before[3] == after[3]
+    assert scheduler.next_due() is None
+
+
+def test_rescheduled_post_fires_at_new_date(scheduled_post):
+    scheduler = Scheduler()
+    scheduler.run_pending()
+    old_due = scheduled_post.pub_date.timestamp()
+    scheduled_post.pub_date += timedelta(hours=1)
+    scheduled_post.save()
+    scheduler.schedule(scheduled_post.pk, scheduled_post.pub_date)
+    assert scheduler.run_pending(now=old_due + 1) == []
+    new_due = scheduled_post.pub_date.timestamp()
+    assert scheduler.run_pending(now=new_due + 1) == [scheduled_post.pk]
+
+
+def test_posts_due_between_reloads_are_not_lost(scheduled_post, settings):
+    scheduler = Scheduler()
+    scheduler.run_pending(now=time.time())
+    settings.SCHEDULER_RELOAD_SECONDS = -1
+    due = scheduled_post.pub_date.timestamp()
+    assert scheduler.run_pending(now=due + 1) == [scheduled_post.pk]
+
+
+def test_admin_lists_only_scheduled_posts(
+        client, django_user_model, scheduled_post, post_with_published_location):
+    admin = django_user_model.objects.create_superuser(
+        'admin', 'admin@example.com', 'password')
+    client.force_login(admin)
+    response = client.get('/admin/blog/scheduledpost/')
+    assert response.status_code == HTTPStatus.OK
+    assert list(response.context['cl'].result_list) == [scheduled_post]
+
+
+def test_command_requires_shared_cache():
+    with pytest.raises(CommandError):
+        call_command('run_scheduler', '--once')
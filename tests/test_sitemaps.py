@@ -0,0 +1,86 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import transaction
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def sitemap_settings(settings, tmp_path):
+    settings.SITEMAP_ROOT = tmp_path
+    settings.SITEMAP_CHUNK_SIZE = 2
+    return settings
+
+
+def get_text(response):
+    return b''.join(response.streaming_content).decode()
+
+
+def test_sitemap_index_lists_chunks(
+        client, many_posts_with_published_locations):
+    index = get_text(client.get('/sitemap.xml'))
+    posts = sorted(post.pk for post in many_posts_with_published_locations)
+    for chunk in {(pk - 1) // 2 for pk in posts}:
+        assert f'/sitemap-posts-{chunk}.xml' in index
+    assert '/sitemap-categories-' in index
+    assert '/sitemap-profiles-' in index
+
+
+def test_sitemap_chunk_contains_visible_posts_only(
+        client, post_with_published_location, future_posts):
+    post = post_with_published_location
+    response = client.get(f'/sitemap-posts-{(post.pk - 1) // 2}.xml')
+    assert response.status_code == HTTPStatus.OK
+    assert f'/posts/{post.pk}/' in get_text(response)
+    for future_post in future_posts:
+        url = f'/sitemap-posts-{(future_post.pk - 1) // 2}.xml'
+        response = client.get(url)
+        if response.status_code == HTTPStatus.OK:
+            assert f'/posts/{future_post.pk}/' not in get_text(response)
+
+
+def test_sitemap_regenerates_only_affected_chunk(
+        client, sitemap_settings, many_posts_with_published_locations):
+    posts = sorted(many_posts_with_published_locations, key=lambda p: p.pk)
+    first, last = posts[0], posts[-1]
+    client.get(f'/sitemap-posts-{(first.pk - 1) // 2}.xml')
+    client.get(f'/sitemap-posts-{(last.pk - 1) // 2}.xml')
+    root = sitemap_settings.SITEMAP_ROOT / 'http___testserver'
+    assert (root / f'sitemap-posts-{(first.pk - 1) // 2}.xml').exists()
+
+    last.is_published = False
+    last.save()
+    assert (root / f'sitemap-posts-{(first.pk - 1) // 2}.xml').exists()
+    assert not (root / f'sitemap-posts-{(last.pk - 1) // 2}.xml').exists()
+
+
+def test_sitemap_files_are_kept_per_host(
+        client, post_with_published_location):
+    chunk = (post_with_published_location.pk - 1) // 2
+    for host in ('localhost', '127.0.0.1'):
+        index = get_text(client.get('/sitemap.xml', HTTP_HOST=host))
+        assert f'http://{host}/sitemap-posts-{chunk}.xml' in index
+        text = get_text(client.get(
+            f'/sitemap-posts-{chunk}.xml', HTTP_HOST=host))
+        assert f'http://{host}/posts/' in text
+
+
+def test_sitemap_dropped_after_commit(
+        client, sitemap_settings, post_with_published_location,
+        django_capture_on_commit_callbacks):
+    sitemap_settings.CACHE_INVALIDATE_ON_COMMIT = True
+    post = post_with_published_location
+    client.get('/sitemap.xml')
+    path = sitemap_settings.SITEMAP_ROOT / 'http___testserver' / 'sitemap.xml'
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            post.is_published = False
+            post.save()
+            assert path.exists()
+    assert not path.exists()
+
+
+def test_unknown_chunk_is_404(client):
+    assert client.get('/sitemap-posts-1000.xml').status_code == 404
+    assert client.get('/sitemap-users-0.xml').status_code == 404
@@ -0,0 +1,52 @@
+import sqlite3
+import threading
+
+import pytest
+from django.db import connection
+
+from blogicum.sqlite3.base import SQLiteCursorWrapper
+
+
+@pytest.mark.django_db
+def test_pragmas_applied_from_settings():
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        assert cursor.fetchone()[0] == 1
+        cursor.execute('PRAGMA busy_timeout')
+        assert cursor.fetchone()[0] == 5000
+        cursor.execute('PRAGMA temp_store')
+        assert cursor.fetchone()[0] == 2
+
+
+def open_connection(path):
+    conn = sqlite3.connect(path, isolation_level=None, timeout=0,
+                           check_same_thread=False)
+    conn.execute('PRAGMA journal_mode = WAL')
+    return conn
+
+
+def test_busy_statement_is_retried_with_backoff(tmp_path):
+    path = tmp_path / 'busy.sqlite3'
+    holder = open_connection(path)
+    holder.execute('CREATE TABLE t (x)')
+    holder.execute('BEGIN IMMEDIATE')
+    release = threading.Timer(0.05, holder.execute, args=('COMMIT',))
+    release.start()
+
+    cursor = open_connection(path).cursor(factory=SQLiteCursorWrapper)
+    cursor.retries, cursor.backoff = 10, 0.01
+    cursor.execute('INSERT INTO t VALUES (%s)', (1,))
+    release.join()
+    assert holder.execute('SELECT count(*) FROM t').fetchone()[0] == 1
+
+
+def test_busy_error_raised_when_retries_exhausted(tmp_path):
+    path = tmp_path / 'busy.sqlite3'
+    holder = open_connection(path)
+    holder.execute('CREATE TABLE t (x)')
+    holder.execute('BEGIN IMMEDIATE')
+
+    cursor = open_connection(path).cursor(factory=SQLiteCursorWrapper)
+    cursor.retries, cursor.backoff = 2, 0.001
+    with pytest.raises(sqlite3.OperationalError):
+        cursor.execute('INSERT INTO t VALUES (%s)', (1,))
@@ -0,0 +1,100 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from blog import timeline
+from blog.constants import POST_LIST_LEN
+from blog.models import Follow, Post, ProlificAuthor, TimelineEntry
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def category(mixer):
+    return mixer.blend('blog.Category', is_published=True)
+
+
+@pytest.fixture
+def write(category):
+    now = timezone.now()
+
+    def write(author, count=1, **kwargs):
+        return [Post.objects.create(
+            title=f'{author.username} {index}', text='Текст', author=author,
+            category=category,
+            pub_date=kwargs.pop('pub_date', now - timedelta(minutes=index)),
+            **kwargs) for index in range(count)]
+    return write
+
+
+def collect(client, url):
+    ids = []
+    while url:
+        response = client.get(url)
+        ids += [post.id for post in response.context['posts']]
+        url = response.context.get('next_url')
+    return ids
+
+
+def test_follow_backfills_and_unfollow_clears(
+        user, another_user, user_client, write, mixer):
+    old = write(another_user, 2)
+    stranger = write(mixer.blend('auth.User'))
+    write(another_user, pub_date=timezone.now() + timedelta(days=1))
+    url = f'/profile/{another_user.username}/'
+    assert 'Подписаться' in user_client.get(url).content.decode()
+    user_client.post(url + 'follow/')
+    assert 'Отписаться' in user_client.get(url).content.decode()
+    new = write(another_user, pub_date=timezone.now())
+
+    ids = [post.id for post in user_client.get(
+        '/following/').context['posts']]
+    assert ids == [new[0].id, old[0].id, old[1].id]
+    assert stranger[0].id not in ids
+
+    user_client.post(url + 'unfollow/')
+    assert not Follow.objects.exists()
+    assert not TimelineEntry.objects.filter(user=user).exists()
+    assert list(user_client.get('/following/').context['posts']) == []
+
+
+def test_cannot_follow_self(user, user_client):
+    user_client.post(f'/profile/{user.username}/follow/')
+    assert not Follow.objects.exists()
+
+
+def test_anonymous_redirected(client):
+    assert client.get('/following/').status_code == HTTPStatus.FOUND
+
+
+def test_prolific_author_merged_on_read(
+        settings, mixer, user, user_client, write):
+    settings.TIMELINE_FANOUT_MAX_FOLLOWERS = 2
+    regular, star = mixer.cycle(2).blend('auth.User')
+    for author in (regular, star):
+        timeline.follow(user, author)
+    timeline.follow(mixer.blend('auth.User'), star)
+    posts = write(regular, POST_LIST_LEN) + write(star, POST_LIST_LEN)
+    assert ProlificAuthor.objects.filter(author=star).exists()
+    assert not TimelineEntry.objects.filter(author=star).exists()
+    assert TimelineEntry.objects.filter(author=regular).count() == (
+        POST_LIST_LEN)
+
+    expected = [post.id for post in sorted(
+        posts, key=lambda post: (post.pub_date, post.id), reverse=True)]
+    assert collect(user_client, '/following/') == expected
+
+
+def test_hidden_and_moved_posts(user, another_user, user_client, write):
+    timeline.follow(user, another_user)
+    hidden, moved = write(another_user, 2)
+    hidden.is_published = False
+    hidden.save()
+    moved.pub_date = timezone.now() + timedelta(days=1)
+    moved.save()
+    assert TimelineEntry.objects.get(post=moved).pub_date == moved.pub_date
+    assert list(user_client.get('/following/').context['posts']) == []
+    assert user_client.get(
+        '/batch/following/?cursor=oops').status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,69 @@
+import math
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from blog import trending
+from blog.counters import views
+from blog.models import PostScore, TrendingWindow
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def posts(mixer, user):
+    category = mixer.blend('blog.Category', is_published=True)
+    return mixer.cycle(3).blend(
+        'blog.Post', author=user, category=category, is_published=True,
+        image='', pub_date=timezone.now() - timedelta(days=1))
+
+
+def titles(response):
+    content = response.content.decode()
+    return [post.title for post in sorted(
+        response.context['object_list'],
+        key=lambda post: content.index(post.title))]
+
+
+def test_views_and_comments_rank_posts(client, mixer, posts, user):
+    first, second, third = posts
+    for _ in range(3):
+        views.hit(first.id)
+    views.hit(third.id)
+    views.flush()
+    mixer.cycle(2).blend('blog.Comment', post=second, author=user)
+    mixer.blend('blog.Post', author=user, is_published=False)
+
+    response = client.get('/popular/')
+    assert titles(response) == [second.title, first.title, third.title]
+    assert [post.comment_count for post in response.context[
+        'object_list']] == [2, 0, 0]
+    week = client.get('/popular/7d/').context['object_list']
+    assert [post.id for post in week] == [second.id, first.id, third.id]
+
+
+def test_hidden_posts_and_unknown_window(client, posts):
+    post = posts[0]
+    trending.record({post.id: 5})
+    post.is_published = False
+    post.save()
+    assert list(client.get('/popular/').context['object_list']) == []
+    assert client.get('/popular/1y/').status_code == HTTPStatus.NOT_FOUND
+
+
+def test_decay_scales_and_drops_scores(settings, posts):
+    now = timezone.now()
+    trending.decay(now)
+    trending.record({posts[0].id: 100, posts[1].id: 0.0101})
+    trending.decay(now)
+    assert PostScore.objects.filter(window='24h').count() == 2
+
+    later = now + timedelta(hours=1)
+    trending.decay(later)
+    score = PostScore.objects.get(post=posts[0], window='24h').score
+    assert score == pytest.approx(100 * math.exp(
+        -3600 / settings.TRENDING_WINDOWS['24h']))
+    assert not PostScore.objects.filter(post=posts[1], window='24h').exists()
+    assert TrendingWindow.objects.get(name='24h').decayed_at == later
@@ -0,0 +1,71 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from blog.backends import CachedModelBackend, user_cache_key
+
+pytestmark = [pytest.mark.django_db]
+
+IDENTITY_TABLES = ('"auth_user"', '"django_session"')
+
+
+@pytest.fixture(autouse=True)
+def shared_cache(settings, tmp_path):
+    # Бэкенд кеширует пользователя только в общем для процессов кеше.
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path / 'cache'),
+    }}
+
+
+def identity_queries(client, url='/pages/about/'):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    return response, [
+        query['sql'] for query in context.captured_queries
+        if any(table in query['sql'] for table in IDENTITY_TABLES)
+    ]
+
+
+def test_authenticated_hit_needs_no_identity_queries(user_client, user):
+    identity_queries(user_client)
+    response, queries = identity_queries(user_client)
+    assert response.context['user'] == user
+    assert queries == []
+
+
+def test_cached_user_invalidated_on_save(user_client, user):
+    identity_queries(user_client)
+    user.first_name = 'Обновлённое'
+    user.save()
+    response, queries = identity_queries(user_client)
+    assert response.context['user'].first_name == 'Обновлённое'
+    assert queries
+
+
+def test_deactivated_user_is_logged_out(user_client, user):
+    identity_queries(user_client)
+    user.is_active = False
+    user.save()
+    response, _ = identity_queries(user_client)
+    assert not response.context['user'].is_authenticated
+
+
+def test_user_forgotten_only_after_commit(
+        user, settings, django_capture_on_commit_callbacks):
+    settings.CACHE_INVALIDATE_ON_COMMIT = True
+    CachedModelBackend().get_user(user.pk)
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            user.save()
+            assert cache.get(user_cache_key(user.pk)) is not None
+    assert cache.get(user_cache_key(user.pk)) is None
+
+
+def test_process_local_cache_is_not_used(user, settings):
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }}
+    assert CachedModelBackend().get_user(user.pk) == user
+    assert cache.get(user_cache_key(user.pk)) is None
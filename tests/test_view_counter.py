@@ -0,0 +1,86 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.db import DatabaseError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.counters import views
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def posts(mixer, user):
+    category = mixer.blend('blog.Category', is_published=True)
+    return mixer.cycle(2).blend(
+        'blog.Post', author=user, category=category, is_published=True,
+        pub_date=timezone.now() - timedelta(days=1))
+
+
+def test_views_buffered_and_flushed_in_one_update(client, settings, posts):
+    settings.VIEW_COUNTER_FLUSH_SECONDS = 3600
+    settings.PAGE_CACHE_ENABLED = True
+    first, second = posts
+    for _ in range(3):
+        client.get(f'/posts/{first.id}/')
+    client.get(f'/posts/{second.id}/')
+    client.get('/posts/999999/')
+    first.refresh_from_db()
+    assert first.views == 0
+
+    with CaptureQueriesContext(connection) as queries:
+        assert views.flush() == 2
+    assert [query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE "blog_post"')] == [
+        queries[0]['sql']]
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert (first.views, second.views) == (3, 1)
+    assert 'Просмотры: 3' in client.get('/').content.decode()
+
+
+def test_middleware_flushes_after_interval(client, settings, posts):
+    settings.VIEW_COUNTER_FLUSH_SECONDS = 0
+    post = posts[0]
+    client.get(f'/posts/{post.id}/')
+    post.refresh_from_db()
+    assert post.views == 1
+    assert views.flush() == 0
+
+
+def test_failed_flush_keeps_page_and_views(client, settings, monkeypatch,
+                                           posts):
+    settings.VIEW_COUNTER_FLUSH_SECONDS = 0
+    post = posts[0]
+
+    def fail(*args, **kwargs):
+        raise DatabaseError('database is locked')
+
+    monkeypatch.setattr('blog.counters.Post.objects.filter', fail)
+    assert client.get(f'/posts/{post.id}/').status_code == HTTPStatus.OK
+    monkeypatch.undo()
+    assert views.flush() == 1
+    post.refresh_from_db()
+    assert post.views == 1
+
+
+def test_save_does_not_overwrite_views(posts):
+    stale = posts[0]
+    views.hit(stale.id)
+    views.flush()
+    stale.title = 'Новый заголовок'
+    stale.save()
+    stale.refresh_from_db()
+    assert (stale.title, stale.views) == ('Новый заголовок', 1)
+
+
+def test_save_of_concurrently_deleted_post_raises(posts):
+    stale = posts[0]
+    type(stale).objects.filter(pk=stale.pk).delete()
+    stale.title = 'Новый заголовок'
+    with pytest.raises(DatabaseError, match='did not affect any rows'):
+        with transaction.atomic():
+            stale.save()
+    assert not type(stale).objects.filter(pk=stale.pk).exists()